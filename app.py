@@ -1,24 +1,32 @@
-from flask import Flask, render_template, request, jsonify, session
+from flask import Flask, render_template, request, jsonify, session, Response, stream_with_context
 import sqlite3
 from functools import wraps
 import os
 import ollama
 import time
 import random
+import json
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from flask import g
 from sqlite3 import IntegrityError
-from ollama import Client
 from tenacity import retry, stop_after_attempt, wait_exponential
+from hedging import HedgedChat
+from opening_pool import LiveTraffic, OpeningPool
+from debate_prompts import (
+    DEBATE_TOPICS, DEBATE_POSITIONS, BOT_PERSONALITIES,
+    mediator_choose_topic, bot_a_prompt, bot_b_prompt, compromise_prompt
+)
 
 app = Flask(__name__)
 app.secret_key = "super_secret_key"  # Required for session storage
 
 # Add this after your imports
-OLLAMA_HOST = "http://207.211.161.65:8080"
-ollama_client = Client(
-    host=OLLAMA_HOST,
-    timeout=120
-)
+OLLAMA_HOST = os.environ.get("OLLAMA_HOST", "http://207.211.161.65:8080")
+# Streams from OLLAMA_HOST, hedging slow first tokens to OLLAMA_HEDGE_HOSTS (see hedging.py)
+llm = HedgedChat.from_env(OLLAMA_HOST, "llama2", timeout=120)
 
 # Database setup
 def get_db():
@@ -55,46 +63,25 @@ def deduct_credit():
 def get_remaining_credits():
     return 50  # Temporary fixed value
 
-# Default debate topics
-DEBATE_TOPICS = [
-    "Should artificial intelligence be regulated?",
-    "Is social media beneficial or harmful to society?",
-    "Should cryptocurrency replace traditional banking?",
-    "Does technology improve human relationships?",
-    "Should governments impose stricter climate change policies?",
-]
-
-# Opposing perspectives for debates
-DEBATE_POSITIONS = [
-    ("I strongly support this stance", "I completely oppose this viewpoint"),
-    ("This approach is the future", "This approach is deeply flawed"),
-    ("The economic benefits outweigh the risks", "The ethical concerns are too great"),
-    ("We must embrace this technology", "We should be cautious about this technology"),
-]
-
-# Add at the top of your file
-BOT_PERSONALITIES = [
-    {
-        "name": "The Logical Analyst",
-        "style": "Using data-driven arguments and precise logical reasoning",
-        "tone": "methodical and authoritative"
-    },
-    {
-        "name": "The Passionate Advocate",
-        "style": "Drawing on emotional appeals and real-world implications",
-        "tone": "passionate and compelling"
-    },
-    {
-        "name": "The Strategic Debater",
-        "style": "Employing rhetorical techniques and strategic argumentation",
-        "tone": "confident and persuasive"
-    },
-    {
-        "name": "The Revolutionary Thinker",
-        "style": "Challenging conventional wisdom with bold new perspectives",
-        "tone": "bold and provocative"
-    }
-]
+# Rounds produced by /debate_round, kept server-side so /compromise doesn't
+# need the arguments re-uploaded. Bounded; oldest rounds are evicted first.
+MAX_TRACKED_ROUNDS = 256
+debate_rounds = OrderedDict()
+debate_rounds_lock = threading.Lock()
+# Generate the compromise speculatively while the user is still reading. Off by
+# default: it costs a third LLM call per round whether or not it is asked for.
+# A request can still opt in or out with "speculative_compromise".
+SPECULATIVE_COMPROMISE = os.environ.get("SPECULATIVE_COMPROMISE", "0") == "1"
+# Speculative compromises run here
+compromise_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="compromise")
+
+# Warm pool of opening arguments for the stock topics. Off by default: it keeps
+# the shared LLM busy even with no users, and idleness is only judged from this
+# process's own requests.
+OPENING_POOL_SIZE = int(os.environ.get("OPENING_POOL_SIZE", 0))
+OPENING_POOL_MAX_AGE = float(os.environ.get("OPENING_POOL_MAX_AGE", 3600))
+OPENING_POOL_COUNTERS = os.environ.get("OPENING_POOL_COUNTERS", "1") == "1"
+live_traffic = LiveTraffic()
 
 # Function to interact with Ollama (Llama 3)
 @retry(
@@ -106,88 +93,76 @@ def ollama_generate_response(prompt, max_length=150, timeout=120):
         print(f"Attempting to connect to Ollama at {OLLAMA_HOST}")
         print(f"Attempting to generate response with prompt: {prompt[:100]}...")
         
-        response = ollama_client.chat(
-            model="llama2",
-            messages=[{
-                "role": "user", 
-                "content": f"{prompt}\nPlease keep your response under {max_length} words."
-            }],
-            options={
-                "timeout": timeout,
-                "num_predict": max_length * 6
-            }
-        )
+        with live_traffic.track():
+            response = llm.chat(
+                messages=[{
+                    "role": "user", 
+                    "content": f"{prompt}\nPlease keep your response under {max_length} words."
+                }],
+                options={
+                    "timeout": timeout,
+                    "num_predict": max_length * 6
+                }
+            )
         print("Successfully generated response")
-        return response['message']['content']
+        return response
     except Exception as e:
         print(f"Error in ollama_generate_response: {str(e)}")
         raise
 
-# Mediator selects a debate topic and assigns positions
-def mediator_choose_topic(user_topic=None):
-    topic = user_topic if user_topic else random.choice(DEBATE_TOPICS)
-    position_a, position_b = random.choice(DEBATE_POSITIONS)
-    return topic, position_a, position_b
-
 # Bot A: Generate an argument using Llama 3
 def bot_a_argument(topic, position_a):
     personality = random.choice(BOT_PERSONALITIES)
-    prompt = f"""
-    You are {personality['name']}, a fierce debater {personality['style']}.
-    Speaking with {personality['tone']}, deliver a powerful opening argument.
-    
-    Topic: '{topic}'
-    Your position: '{position_a}'
-    
-    IMPORTANT DEBATE RULES:
-    - Start with a bold, attention-grabbing statement
-    - Use assertive language ("I assert", "It is clear", "The evidence proves")
-    - Never apologize or hedge your position
-    - Speak with absolute conviction
-    - Challenge opposing viewpoints preemptively
-    - End with a strong concluding statement
-    
-    Make your argument compelling and authoritative.
-    """
-    return ollama_generate_response(prompt), personality
+    return ollama_generate_response(bot_a_prompt(topic, position_a, personality)), personality
 
 # Bot B: Generate a counterargument using Llama 3
 def bot_b_counterargument(topic, position_b, argument_a):
     personality = random.choice(BOT_PERSONALITIES)
-    prompt = f"""
-    You are {personality['name']}, a masterful debater {personality['style']}.
-    Speaking with {personality['tone']}, demolish your opponent's argument.
-    
-    Topic: '{topic}'
-    Your position: '{position_b}'
-    Opponent's argument: '{argument_a}'
-    
-    IMPORTANT DEBATE RULES:
-    - Begin with a powerful rebuttal
-    - Directly attack the weakest points in their argument
-    - Use decisive language ("This is fundamentally flawed", "The facts clearly show")
-    - Never concede points or apologize
-    - Speak with unwavering confidence
-    - End by reinforcing your superior position
-    
-    Deliver a devastating counterargument that leaves no room for doubt.
-    """
-    return ollama_generate_response(prompt), personality
+    return ollama_generate_response(bot_b_prompt(topic, position_b, argument_a, personality)), personality
 
 # Mediator: Generate a compromise based on both arguments
 def mediator_summarize_compromise(topic, argument_a, argument_b):
-    prompt = f"""
-    The debate topic is '{topic}'.
-    Bot A argued: '{argument_a}'
-    Bot B counter-argued: '{argument_b}'
-
-    - Your task is to generate a **compromise** between these two perspectives.
-    - The compromise should acknowledge the strengths of both arguments while suggesting a balanced resolution.
-    """
-    
-    compromise = ollama_generate_response(prompt)
+    compromise = ollama_generate_response(compromise_prompt(topic, argument_a, argument_b))
     return compromise
 
+# Pre-generate an opening (and optionally Bot B's counter) for the warm pool
+def pregenerate_opening(topic, position_a, position_b):
+    argument_a, personality_a = bot_a_argument(topic, position_a)
+    entry = {"argument_a": argument_a, "personality_a": personality_a}
+    # Live traffic may have arrived during the first call; the counter is optional
+    if OPENING_POOL_COUNTERS and opening_pool.is_idle():
+        entry["argument_b"], entry["personality_b"] = bot_b_counterargument(topic, position_b, argument_a)
+    entry["topic"], entry["position_b"] = topic, position_b
+    return entry
+
+opening_pool = OpeningPool(
+    [(topic, position_a, position_b)
+     for topic in DEBATE_TOPICS
+     for position_a, position_b in DEBATE_POSITIONS],
+    pregenerate_opening,
+    live_traffic,
+    size_per_combination=OPENING_POOL_SIZE,
+    max_age_seconds=OPENING_POOL_MAX_AGE
+)
+
+@app.before_request
+def start_opening_pool():
+    opening_pool.start()
+
+def opening_argument(topic, position_a, position_b, from_pool):
+    """Takes a pooled opening for stock topics, falling back to live generation."""
+    opening = opening_pool.take((topic, position_a, position_b)) if from_pool else None
+    if opening:
+        return opening["argument_a"], opening["personality_a"]
+    return bot_a_argument(topic, position_a)
+
+def counterargument(topic, position_b, argument_a):
+    """Uses the pre-generated counter when argument_a came from the pool."""
+    pooled = opening_pool.take_counter(argument_a)
+    if pooled and pooled["topic"] == topic and pooled["position_b"] == position_b:
+        return pooled["argument_b"], pooled["personality_b"]
+    return bot_b_counterargument(topic, position_b, argument_a)
+
 @app.route("/")
 def index():
     return render_template("index.html")
@@ -209,7 +184,7 @@ def generate():
 
         # Generate only Bot A's response first
         print("Attempting to generate Bot A's response...")
-        argument_a, personality_a = bot_a_argument(topic, position_a)
+        argument_a, personality_a = opening_argument(topic, position_a, position_b, from_pool=not user_topic)
         print("Successfully generated Bot A's response")
 
         return jsonify({
@@ -232,7 +207,7 @@ def counter_argument():
         argument_a = data.get("argument_a")
 
         # Generate Bot B's response
-        argument_b, personality_b = bot_b_counterargument(topic, position_b, argument_a)
+        argument_b, personality_b = counterargument(topic, position_b, argument_a)
 
         return jsonify({
             "argument_b": argument_b,
@@ -241,6 +216,66 @@ def counter_argument():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+def remember_round(round_id, debate_round):
+    with debate_rounds_lock:
+        debate_rounds[round_id] = debate_round
+        while len(debate_rounds) > MAX_TRACKED_ROUNDS:
+            _, evicted = debate_rounds.popitem(last=False)
+            if evicted.get("compromise_future"):
+                evicted["compromise_future"].cancel()
+
+def get_round(round_id):
+    with debate_rounds_lock:
+        return debate_rounds.get(round_id)
+
+@app.route("/debate_round", methods=["POST"])
+@check_credits
+def debate_round():
+    """Runs Bot A -> Bot B (-> mediator) in one request, streaming each stage as NDJSON."""
+    user_data = request.get_json(silent=True)
+    if user_data is None:
+        return jsonify({"error": "Invalid request, no JSON received."}), 400
+
+    user_topic = user_data.get("user_topic", None)
+    speculative = user_data.get("speculative_compromise")
+    if not isinstance(speculative, bool):
+        # Only a JSON true/false overrides the default; "false" or 0 must not enable it
+        speculative = SPECULATIVE_COMPROMISE
+
+    def stages():
+        def event(payload):
+            return json.dumps(payload) + "\n"
+
+        try:
+            round_id = uuid.uuid4().hex
+            topic, position_a, position_b = mediator_choose_topic(user_topic)
+            yield event({
+                "stage": "topic",
+                "round_id": round_id,
+                "topic": topic,
+                "position_a": position_a,
+                "position_b": position_b
+            })
+
+            argument_a, personality_a = opening_argument(topic, position_a, position_b, from_pool=not user_topic)
+            yield event({"stage": "argument_a", "argument_a": argument_a, "personality_a": personality_a})
+
+            argument_b, personality_b = counterargument(topic, position_b, argument_a)
+            round_state = {"topic": topic, "argument_a": argument_a, "argument_b": argument_b}
+            if speculative:
+                round_state["compromise_future"] = compromise_executor.submit(
+                    mediator_summarize_compromise, topic, argument_a, argument_b
+                )
+            remember_round(round_id, round_state)
+            yield event({"stage": "argument_b", "argument_b": argument_b, "personality_b": personality_b})
+
+            yield event({"stage": "done", "round_id": round_id})
+        except Exception as e:
+            print(f"Error in debate_round endpoint: {str(e)}")
+            yield event({"stage": "error", "error": str(e)})
+
+    return Response(stream_with_context(stages()), mimetype="application/x-ndjson")
+
 @app.route("/refine", methods=["POST"])
 def refine():
     if "topic" not in session:
@@ -265,6 +300,31 @@ def refine():
 
 @app.route("/compromise", methods=["POST"])
 def compromise():
+    data = request.get_json(silent=True) or {}
+    round_id = data.get("round_id")
+    if round_id:
+        debate_round = get_round(round_id)
+        if debate_round is None:
+            return jsonify({"error": "Unknown or expired debate round, generate a new one!"}), 404
+        try:
+            compromise_statement = None
+            future = debate_round.get("compromise_future")
+            if future is not None and not future.cancelled():
+                try:
+                    compromise_statement = future.result()
+                except Exception as e:
+                    print(f"Speculative compromise failed, regenerating: {str(e)}")
+            if compromise_statement is None:
+                compromise_statement = mediator_summarize_compromise(
+                    debate_round["topic"], debate_round["argument_a"], debate_round["argument_b"]
+                )
+            return jsonify({
+                "compromise": compromise_statement
+            })
+        except Exception as e:
+            print(f"Error generating compromise: {str(e)}") # Debug log
+            return jsonify({"error": f"Failed to generate compromise: {str(e)}"}), 500
+
     if "topic" not in session:
         return jsonify({"error": "No debate found, generate one first!"}), 400
     
@@ -0,0 +1,340 @@
+"""ASGI serving mode for the debate app.
+
+Same routes and templates/index.html contract as app.py, on Quart (the
+asyncio re-implementation of the Flask API). Upstream Ollama calls and
+SQLite access never block the event loop, so an open debate costs a
+coroutine rather than an OS thread. When a client disconnects, Quart cancels
+the request task, and the cancellation propagates into the in-flight Ollama
+request, which is closed instead of being left to finish generating.
+
+Run with:
+    hypercorn asgi_app:app --bind 0.0.0.0:5000
+"""
+import asyncio
+import json
+import os
+import random
+import uuid
+from collections import OrderedDict
+from functools import wraps
+
+import aiosqlite
+import httpx
+from quart import Quart, Response, g, jsonify, render_template, request, session
+from tenacity import retry, stop_after_attempt, wait_exponential
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from hedging import AsyncHedgedChat
+from debate_prompts import (
+    BOT_PERSONALITIES,
+    bot_a_prompt,
+    bot_b_prompt,
+    compromise_prompt,
+    mediator_choose_topic,
+)
+
+app = Quart(__name__)
+app.secret_key = "super_secret_key"  # Required for session storage
+
+OLLAMA_HOST = os.environ.get("OLLAMA_HOST", "http://207.211.161.65:8080")
+# Upper bound on concurrent upstream requests; beyond it requests queue
+# inside the client instead of opening more sockets.
+UPSTREAM_MAX_CONNECTIONS = int(os.environ.get("UPSTREAM_MAX_CONNECTIONS", 1000))
+llm = AsyncHedgedChat.from_env(
+    OLLAMA_HOST, "llama2",
+    timeout=120,
+    client_kwargs={"limits": httpx.Limits(max_connections=UPSTREAM_MAX_CONNECTIONS, max_keepalive_connections=100)}
+)
+
+MAX_TRACKED_ROUNDS = 256
+debate_rounds = OrderedDict()
+# See app.py: speculative compromises are opt-in
+SPECULATIVE_COMPROMISE = os.environ.get("SPECULATIVE_COMPROMISE", "0") == "1"
+
+
+# Database setup
+async def get_db():
+    db = getattr(g, '_database', None)
+    if db is None:
+        db = g._database = await aiosqlite.connect('debate.db')
+        db.row_factory = aiosqlite.Row
+    return db
+
+
+@app.teardown_appcontext
+async def close_connection(exception):
+    db = getattr(g, '_database', None)
+    if db is not None:
+        await db.close()
+
+
+# Initialize database
+async def init_db():
+    async with app.app_context():
+        db = await get_db()
+        with open(os.path.join(app.root_path, 'schema.sql')) as f:
+            await db.executescript(f.read())
+        await db.commit()
+
+
+# Credit system functions (temporary bypass)
+def check_credits(f):
+    @wraps(f)
+    async def decorated_function(*args, **kwargs):
+        return await f(*args, **kwargs)
+    return decorated_function
+
+
+def cancel_on_disconnect(f):
+    """Logs when a client disconnect cancels an in-flight generation."""
+    @wraps(f)
+    async def decorated_function(*args, **kwargs):
+        try:
+            return await f(*args, **kwargs)
+        except asyncio.CancelledError:
+            print(f"Client disconnected; cancelled {request.path}")
+            raise
+    return decorated_function
+
+
+@retry(
+    stop=stop_after_attempt(3),
+    wait=wait_exponential(multiplier=1, min=4, max=10)
+)
+async def ollama_generate_response(prompt, max_length=150, timeout=120):
+    try:
+        return await llm.chat(
+            messages=[{
+                "role": "user",
+                "content": f"{prompt}\nPlease keep your response under {max_length} words."
+            }],
+            options={
+                "timeout": timeout,
+                "num_predict": max_length * 6
+            }
+        )
+    except Exception as e:
+        print(f"Error in ollama_generate_response: {str(e)}")
+        raise
+
+
+async def bot_a_argument(topic, position_a):
+    personality = random.choice(BOT_PERSONALITIES)
+    return await ollama_generate_response(bot_a_prompt(topic, position_a, personality)), personality
+
+
+async def bot_b_counterargument(topic, position_b, argument_a):
+    personality = random.choice(BOT_PERSONALITIES)
+    return await ollama_generate_response(bot_b_prompt(topic, position_b, argument_a, personality)), personality
+
+
+async def mediator_summarize_compromise(topic, argument_a, argument_b):
+    return await ollama_generate_response(compromise_prompt(topic, argument_a, argument_b))
+
+
+def remember_round(round_id, debate_round):
+    debate_rounds[round_id] = debate_round
+    while len(debate_rounds) > MAX_TRACKED_ROUNDS:
+        _, evicted = debate_rounds.popitem(last=False)
+        if evicted.get("compromise_task"):
+            evicted["compromise_task"].cancel()
+
+
+@app.route("/")
+async def index():
+    return await render_template("index.html")
+
+
+@app.route("/generate", methods=["POST"])
+@check_credits
+@cancel_on_disconnect
+async def generate():
+    try:
+        user_data = await request.get_json(silent=True)
+        if not user_data:
+            return jsonify({"error": "Invalid request, no JSON received."}), 400
+
+        topic, position_a, position_b = mediator_choose_topic(user_data.get("user_topic", None))
+        argument_a, personality_a = await bot_a_argument(topic, position_a)
+
+        return jsonify({
+            "topic": topic,
+            "position_a": position_a,
+            "position_b": position_b,
+            "argument_a": argument_a,
+            "personality_a": personality_a
+        })
+    except Exception as e:
+        print(f"Error in generate endpoint: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/counter_argument", methods=["POST"])
+@cancel_on_disconnect
+async def counter_argument():
+    try:
+        data = await request.get_json()
+        argument_b, personality_b = await bot_b_counterargument(
+            data.get("topic"), data.get("position_b"), data.get("argument_a")
+        )
+        return jsonify({
+            "argument_b": argument_b,
+            "personality_b": personality_b
+        })
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/debate_round", methods=["POST"])
+@check_credits
+async def debate_round():
+    """Runs Bot A -> Bot B (-> mediator) in one request, streaming each stage as NDJSON."""
+    user_data = await request.get_json(silent=True)
+    if user_data is None:
+        return jsonify({"error": "Invalid request, no JSON received."}), 400
+
+    user_topic = user_data.get("user_topic", None)
+    speculative = user_data.get("speculative_compromise")
+    if not isinstance(speculative, bool):
+        # Only a JSON true/false overrides the default; "false" or 0 must not enable it
+        speculative = SPECULATIVE_COMPROMISE
+
+    async def stages():
+        def event(payload):
+            return json.dumps(payload) + "\n"
+
+        try:
+            round_id = uuid.uuid4().hex
+            topic, position_a, position_b = mediator_choose_topic(user_topic)
+            yield event({
+                "stage": "topic",
+                "round_id": round_id,
+                "topic": topic,
+                "position_a": position_a,
+                "position_b": position_b
+            })
+
+            argument_a, personality_a = await bot_a_argument(topic, position_a)
+            yield event({"stage": "argument_a", "argument_a": argument_a, "personality_a": personality_a})
+
+            argument_b, personality_b = await bot_b_counterargument(topic, position_b, argument_a)
+            round_state = {"topic": topic, "argument_a": argument_a, "argument_b": argument_b}
+            if speculative:
+                round_state["compromise_task"] = asyncio.ensure_future(
+                    mediator_summarize_compromise(topic, argument_a, argument_b)
+                )
+            remember_round(round_id, round_state)
+            yield event({"stage": "argument_b", "argument_b": argument_b, "personality_b": personality_b})
+
+            yield event({"stage": "done", "round_id": round_id})
+        except asyncio.CancelledError:
+            print("Client disconnected; cancelled /debate_round")
+            raise
+        except Exception as e:
+            print(f"Error in debate_round endpoint: {str(e)}")
+            yield event({"stage": "error", "error": str(e)})
+
+    return Response(stages(), mimetype="application/x-ndjson")
+
+
+@app.route("/refine", methods=["POST"])
+@cancel_on_disconnect
+async def refine():
+    if "topic" not in session:
+        return jsonify({"error": "No debate found, generate one first!"})
+
+    topic = session["topic"]
+    argument_a, _ = await bot_a_argument(topic, session["position_a"])
+    argument_b, _ = await bot_b_counterargument(topic, session["position_b"], argument_a)
+
+    session["arguments"].append((argument_a, argument_b))
+    session["iterations"] += 1
+
+    return jsonify({
+        "arguments": session["arguments"]
+    })
+
+
+@app.route("/compromise", methods=["POST"])
+@cancel_on_disconnect
+async def compromise():
+    data = await request.get_json(silent=True) or {}
+    round_id = data.get("round_id")
+    if round_id:
+        debate_round = debate_rounds.get(round_id)
+        if debate_round is None:
+            return jsonify({"error": "Unknown or expired debate round, generate a new one!"}), 404
+        argument_a, argument_b = debate_round["argument_a"], debate_round["argument_b"]
+        topic = debate_round["topic"]
+    elif "topic" in session:
+        topic = session["topic"]
+        argument_a, argument_b = session["arguments"][-1]
+        debate_round = {}
+    else:
+        return jsonify({"error": "No debate found, generate one first!"}), 400
+
+    try:
+        compromise_statement = None
+        task = debate_round.get("compromise_task")
+        if task is not None and not task.cancelled():
+            try:
+                # shield: a disconnect here must not cancel the shared speculative task
+                compromise_statement = await asyncio.shield(task)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Speculative compromise failed, regenerating: {str(e)}")
+        if compromise_statement is None:
+            compromise_statement = await mediator_summarize_compromise(topic, argument_a, argument_b)
+        return jsonify({
+            "compromise": compromise_statement
+        })
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        print(f"Error generating compromise: {str(e)}")
+        return jsonify({"error": f"Failed to generate compromise: {str(e)}"}), 500
+
+
+@app.route("/register", methods=["POST"])
+async def register():
+    data = await request.get_json()
+    username = data.get('username')
+    password = data.get('password')
+
+    if not username or not password:
+        return jsonify({"error": "Username and password required"}), 400
+
+    db = await get_db()
+    try:
+        await db.execute(
+            'INSERT INTO users (username, password_hash) VALUES (?, ?)',
+            [username, generate_password_hash(password)]
+        )
+        await db.commit()
+        return jsonify({"message": "Registration successful"}), 201
+    except aiosqlite.IntegrityError:
+        return jsonify({"error": "Username already exists"}), 409
+
+
+@app.route("/login", methods=["POST"])
+async def login():
+    data = await request.get_json()
+    username = data.get('username')
+    password = data.get('password')
+
+    db = await get_db()
+    async with db.execute('SELECT * FROM users WHERE username = ?', [username]) as cursor:
+        user = await cursor.fetchone()
+
+    if user and check_password_hash(user['password_hash'], password):
+        session['user_id'] = user['id']
+        return jsonify({
+            "message": "Login successful",
+            "credits": user['credits']
+        })
+    return jsonify({"error": "Invalid credentials"}), 401
+
+
+if __name__ == "__main__":
+    app.run(debug=True)
@@ -0,0 +1,455 @@
+"""Reproducible benchmark suite for the debate app and the Socratic discussion engine.
+
+Every benchmark runs against a local Ollama stub (see ollama_stub.py), so
+numbers do not depend on the shared host or on real model speed. Results are
+written as JSON so runs can be compared:
+
+    python benchmarks.py                          # run everything
+    python benchmarks.py --only novelty,save_log  # run a subset
+    python benchmarks.py --compare old.json new.json
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List
+
+import numpy as np
+
+from hedging import Backend, HedgedChat
+from log_store import LogStore, open_log_store
+from ollama_stub import OllamaStubServer, StubConfig, generate_text
+
+BENCHMARKS = ["discussion", "routes", "novelty", "save_log", "archive", "hedging", "soak"]
+# The soak test takes a long time, so it only runs when asked for with --only
+DEFAULT_BENCHMARKS = ["discussion", "routes", "novelty", "save_log", "archive", "hedging"]
+RESULTS_DIR = "benchmark_results"
+
+
+def summarize(samples: List[float]) -> Dict:
+    """Latency summary in seconds."""
+    if not samples:
+        return {"count": 0}
+    values = np.asarray(samples, dtype=np.float64)
+    return {
+        "count": int(values.size),
+        "mean": float(values.mean()),
+        "p50": float(np.percentile(values, 50)),
+        "p90": float(np.percentile(values, 90)),
+        "p99": float(np.percentile(values, 99)),
+        "max": float(values.max()),
+    }
+
+
+def synthetic_session(rng: random.Random, session_id: str, iterations: int = 3) -> Dict:
+    """A session shaped like the entries in discussion_logs.json."""
+    return {
+        "session_id": session_id,
+        "topics": [generate_text(rng, 3), generate_text(rng, 3)],
+        "iterations": [{
+            "iteration": i + 1,
+            "bot_a_connection": generate_text(rng, 300),
+            "novelty_score": rng.random(),
+            "bot_b_critique": generate_text(rng, 300),
+            "bot_a_refined": generate_text(rng, 300),
+            "bot_c_decision": generate_text(rng, 250),
+        } for i in range(iterations)],
+    }
+
+
+def bench_discussion(manager, args) -> Dict:
+    """Wall-clock per run_discussion iteration against the stub."""
+    manager.log_store = LogStore(os.path.join(args.workdir, "discussion_bench.json"))
+    durations = []
+    start = time.perf_counter()
+    for run in range(args.discussions):
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            asyncio.run(manager.run_discussion(
+                max_iterations=args.iterations,
+                topics=["Jazz improvisation", "Quantum tunnelling"],
+            ))
+        durations.extend(it["duration_seconds"] for it in manager.session_log["iterations"])
+    return {
+        "discussions": args.discussions,
+        "iterations_per_discussion": args.iterations,
+        "total_seconds": time.perf_counter() - start,
+        "iteration_seconds": summarize(durations),
+    }
+
+
+def bench_routes(stub_url: str, args) -> Dict:
+    """Throughput and latency percentiles of the Flask routes under concurrent load."""
+    os.environ["OLLAMA_HOST"] = stub_url
+    # The warm pool would add background calls to the stub and skew its stats
+    os.environ["OPENING_POOL_SIZE"] = "0"
+    from werkzeug.serving import make_server
+    import app as debate_app
+
+    server = make_server("127.0.0.1", 0, debate_app.app, threaded=True)
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    executor = ThreadPoolExecutor(max_workers=1)
+    executor.submit(server.serve_forever)
+
+    def post(path: str, payload: Dict) -> float:
+        request = urllib.request.Request(
+            base_url + path,
+            data=json.dumps(payload).encode(),
+            headers={"Content-Type": "application/json"},
+        )
+        start = time.perf_counter()
+        with urllib.request.urlopen(request, timeout=300) as response:
+            response.read()
+        return time.perf_counter() - start
+
+    routes = {
+        "/generate": {"user_topic": "Should cities ban cars?"},
+        "/counter_argument": {
+            "topic": "Should cities ban cars?",
+            "position_b": "I completely oppose this viewpoint",
+            "argument_a": generate_text(random.Random(0), 150),
+        },
+        "/debate_round": {"user_topic": "Should cities ban cars?", "speculative_compromise": False},
+    }
+    results = {}
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            for path, payload in routes.items():
+                latencies, errors = [], 0
+                start = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+                    futures = [pool.submit(post, path, payload) for _ in range(args.requests)]
+                    for future in futures:
+                        try:
+                            latencies.append(future.result())
+                        except Exception:
+                            errors += 1
+                elapsed = time.perf_counter() - start
+                results[path] = {
+                    "concurrency": args.concurrency,
+                    "requests": args.requests,
+                    "errors": errors,
+                    "throughput_rps": len(latencies) / elapsed,
+                    "latency_seconds": summarize(latencies),
+                }
+    finally:
+        server.shutdown()
+        executor.shutdown()
+    return results
+
+
+def bench_novelty(manager, args) -> Dict:
+    """NoveltyDetector scoring cost, pair by pair and batched."""
+    detector = manager.bot.novelty_detector
+    rng = random.Random(args.seed)
+    new_texts = [generate_text(rng, 200) for _ in range(args.pairs)]
+    previous_texts = [generate_text(rng, 200) for _ in range(args.pairs)]
+
+    per_pair = []
+    for new_text, previous_text in zip(new_texts, previous_texts):
+        start = time.perf_counter()
+        detector.novelty_score(new_text, previous_text)
+        per_pair.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    detector.batch_novelty_scores(new_texts, previous_texts)
+    batch_seconds = time.perf_counter() - start
+
+    return {
+        "pairs": args.pairs,
+        "per_pair_seconds": summarize(per_pair),
+        "batch_seconds": batch_seconds,
+        "batch_pairs_per_second": args.pairs / batch_seconds,
+    }
+
+
+def bench_save_log(manager, args) -> Dict:
+    """Per-iteration log write cost as the log file grows."""
+    manager.log_store = open_log_store(os.path.join(args.workdir, f"save_log_bench.{args.log_format}"))
+    rng = random.Random(args.seed)
+    samples = []
+    for n in range(1, args.log_sessions + 1):
+        session = synthetic_session(rng, f"bench_{n}")
+        iterations = session.pop("iterations")
+        start = time.perf_counter()
+        for iteration in iterations:
+            manager.log_store.append_iteration(session, iteration)
+        elapsed = (time.perf_counter() - start) / len(iterations)
+        if n == 1 or n % max(args.log_sessions // 10, 1) == 0:
+            samples.append({
+                "sessions": n,
+                "file_bytes": os.path.getsize(manager.log_store.log_file),
+                "seconds_per_iteration": elapsed,
+            })
+    return {"format": args.log_format, "samples": samples}
+
+
+def bench_archive(manager, args) -> Dict:
+    """Size, full-scan and single-session read times of the transcript archive vs the JSON log.
+
+    The stub's vocabulary is small, so synthetic sessions compress better than
+    real transcripts; compare ratios between runs, not against production logs.
+    """
+    import transcript_archive
+
+    rng = random.Random(args.seed)
+    json_path = os.path.join(args.workdir, "archive_bench.json")
+    archive_path = os.path.join(args.workdir, "archive_bench.archive")
+    sessions = [synthetic_session(rng, f"bench_{n}") for n in range(args.log_sessions)]
+    LogStore(json_path)._write({"discussions": sessions})
+    del sessions
+
+    start = time.perf_counter()
+    stats = transcript_archive.build(json_path, archive_path)
+    build_seconds = time.perf_counter() - start
+
+    def timed(fn) -> float:
+        start = time.perf_counter()
+        fn()
+        return time.perf_counter() - start
+
+    json_store, archive_store = LogStore(json_path), open_log_store(archive_path, read_only=True)
+    lookups = [f"bench_{rng.randrange(args.log_sessions)}" for _ in range(20)]
+    return {
+        "sessions": args.log_sessions,
+        "json_bytes": stats["source_bytes"],
+        "archive_bytes": stats["archive_bytes"],
+        "dictionary_bytes": stats["dictionary_bytes"],
+        "compression_ratio": stats["source_bytes"] / stats["archive_bytes"],
+        "build_seconds": build_seconds,
+        "json_load_seconds": summarize([timed(json_store.load) for _ in range(5)]),
+        "archive_scan_seconds": summarize([timed(lambda: sum(1 for _ in archive_store.iter_sessions()))
+                                           for _ in range(5)]),
+        "json_get_session_seconds": summarize([timed(lambda: json_store.get_session(i)) for i in lookups]),
+        "archive_get_session_seconds": summarize([timed(lambda: archive_store.get_session(i)) for i in lookups]),
+    }
+
+
+def bench_hedging(manager, args) -> Dict:
+    """Turn latency and backend load with and without hedging, against heavy-tailed stubs."""
+    def tail_config(seed):
+        return StubConfig(tokens_per_second=2000, latency=args.hedge_latency, response_words=40,
+                          hang_rate=args.hedge_hang_rate, hang_seconds=5.0, seed=seed)
+
+    def run(hedge: bool) -> Dict:
+        stubs = [OllamaStubServer(config=tail_config(args.seed))]
+        if hedge:
+            stubs.append(OllamaStubServer(config=tail_config(args.seed + 1)))
+        llm = HedgedChat([Backend(stub.start()) for stub in stubs], timeout=30)
+        messages = [{"role": "user", "content": "Make the case for public libraries."}]
+        latencies, errors = [], 0
+
+        def turn() -> float:
+            start = time.perf_counter()
+            llm.chat(messages)
+            return time.perf_counter() - start
+
+        try:
+            with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+                for future in [pool.submit(turn) for _ in range(args.requests)]:
+                    try:
+                        latencies.append(future.result())
+                    except Exception:
+                        errors += 1
+            backend_requests = sum(stub.stats()["requests"] for stub in stubs)
+        finally:
+            for stub in stubs:
+                stub.stop()
+        return {
+            "errors": errors,
+            "latency_seconds": summarize(latencies),
+            "backend_requests_per_turn": backend_requests / args.requests,
+            "hedge_stats": llm.stats(),
+        }
+
+    return {"requests": args.requests, "unhedged": run(False), "hedged": run(True)}
+
+
+def rss_bytes() -> int:
+    """Current resident set size (Linux); falls back to the peak elsewhere."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def bench_soak(manager, args) -> Dict:
+    """RSS over many back-to-back discussions in bounded-memory mode."""
+    stub = OllamaStubServer(config=StubConfig(
+        tokens_per_second=1e6, latency="fixed:0", response_words=80, seed=args.seed
+    ))
+    manager.bot.llm = HedgedChat([Backend(stub.start())])
+    manager.log_store = open_log_store(os.path.join(args.workdir, "soak.jsonl"))
+    manager.retain_iterations = False
+
+    samples = []
+    every = max(args.soak_discussions // 50, 1)
+    start = time.perf_counter()
+    try:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            for n in range(1, args.soak_discussions + 1):
+                asyncio.run(manager.run_discussion(
+                    max_iterations=args.iterations,
+                    topics=["Jazz improvisation", "Quantum tunnelling"],
+                ))
+                if n == 1 or n % every == 0:
+                    samples.append({"discussions": n, "rss_bytes": rss_bytes()})
+    finally:
+        stub.stop()
+
+    # Growth after warm-up (first quarter), in bytes per 1000 discussions
+    steady = samples[len(samples) // 4:]
+    slope = 0.0
+    if len(steady) >= 2:
+        x = np.array([sample["discussions"] for sample in steady], dtype=np.float64)
+        y = np.array([sample["rss_bytes"] for sample in steady], dtype=np.float64)
+        slope = float(np.polyfit(x, y, 1)[0] * 1000)
+    return {
+        "discussions": args.soak_discussions,
+        "iterations_per_discussion": args.iterations,
+        "seconds": time.perf_counter() - start,
+        "rss_start_bytes": samples[0]["rss_bytes"],
+        "rss_end_bytes": samples[-1]["rss_bytes"],
+        "rss_growth_bytes_per_1k_discussions": slope,
+        "log_bytes": os.path.getsize(manager.log_store.log_file),
+        "recent_iterations": manager.iteration_stats(),
+        "samples": samples,
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return "unknown"
+
+
+def flatten(results: Dict, prefix: str = "") -> Dict[str, float]:
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}.{key}" if prefix else str(key)
+        if isinstance(value, dict):
+            flat.update(flatten(value, name))
+        elif isinstance(value, list):
+            for i, item in enumerate(value):
+                if isinstance(item, dict):
+                    flat.update(flatten(item, f"{name}[{i}]"))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare(old_path: str, new_path: str):
+    with open(old_path) as f:
+        old = flatten(json.load(f)["results"])
+    with open(new_path) as f:
+        new = flatten(json.load(f)["results"])
+
+    print(f"{'metric':60} {'old':>12} {'new':>12} {'change':>9}")
+    for name in sorted(old.keys() & new.keys()):
+        change = (new[name] - old[name]) / old[name] * 100 if old[name] else 0.0
+        print(f"{name:60} {old[name]:12.4f} {new[name]:12.4f} {change:+8.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the benchmark suite against a local Ollama stub")
+    parser.add_argument("--only", default=",".join(DEFAULT_BENCHMARKS),
+                        help=f"Comma-separated subset of: {', '.join(BENCHMARKS)}")
+    parser.add_argument("--output", help="Result file (default: benchmark_results/<timestamp>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="Compare two result files")
+    parser.add_argument("--seed", type=int, default=0)
+    # Stub behaviour
+    parser.add_argument("--tokens-per-second", type=float, default=200.0)
+    parser.add_argument("--latency", default="lognormal:-3.0,0.5")
+    parser.add_argument("--response-words", type=int, default=120)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    # Workload sizes
+    parser.add_argument("--discussions", type=int, default=2)
+    parser.add_argument("--iterations", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--pairs", type=int, default=256)
+    parser.add_argument("--log-sessions", type=int, default=200)
+    parser.add_argument("--log-format", choices=["json", "jsonl"], default="json")
+    parser.add_argument("--hedge-latency", default="pareto:0.05,1.5",
+                        help="First-token latency of the stubs in the hedging benchmark")
+    parser.add_argument("--hedge-hang-rate", type=float, default=0.02)
+    parser.add_argument("--soak-discussions", type=int, default=10000)
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    selected = [name.strip() for name in args.only.split(",") if name.strip()]
+    unknown = set(selected) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"Unknown benchmarks: {', '.join(sorted(unknown))}")
+
+    random.seed(args.seed)
+    config = StubConfig(
+        tokens_per_second=args.tokens_per_second,
+        latency=args.latency,
+        response_words=args.response_words,
+        failure_rate=args.failure_rate,
+        seed=args.seed,
+    )
+    stub = OllamaStubServer(config=config)
+    stub_url = stub.start()
+    print(f"Ollama stub running at {stub_url}")
+
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        args.workdir = workdir
+        manager = None
+        if set(selected) & {"discussion", "novelty", "save_log", "soak"}:
+            from socratic_debate import DiscussionManager
+            manager = DiscussionManager(host=stub_url, log_file=os.path.join(workdir, "logs.json"))
+
+        try:
+            for name in selected:
+                print(f"Running {name} benchmark...")
+                if name == "routes":
+                    results[name] = bench_routes(stub_url, args)
+                else:
+                    results[name] = globals()[f"bench_{name}"](manager, args)
+        finally:
+            stub_stats = stub.stats()
+            stub.stop()
+
+    report = {
+        "timestamp": datetime.now().isoformat(),
+        "git_commit": git_commit(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "stub": dict(config.to_dict(), **stub_stats),
+        "args": {k: v for k, v in vars(args).items() if k not in ("workdir", "compare")},
+        "results": results,
+    }
+
+    output = args.output
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, datetime.now().strftime("%Y%m%d_%H%M%S") + ".json")
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(results, indent=2))
+    print(f"\nResults saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
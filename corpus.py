@@ -0,0 +1,311 @@
+"""Columnar export of the discussion corpus and fast aggregate queries over it.
+
+``export`` flattens every session/iteration in the log store into NumPy
+columns (one ``.npy`` file per column), UTF-8 string tables (a blob plus an
+``int64`` offsets array) and a contiguous ``float32`` embedding matrix.
+``query`` memory-maps those files, so aggregates over millions of iterations
+never materialize the transcripts in Python objects.
+
+    python corpus.py export discussion_logs.json corpus_export/
+    python corpus.py export discussion_logs.json corpus_export/ --embed
+    python corpus.py query corpus_export/ mean-novelty
+    python corpus.py query corpus_export/ interventions
+    python corpus.py query corpus_export/ perspectives
+"""
+import argparse
+import json
+import os
+from array import array
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from log_store import decode_vector, open_log_store
+
+FORMAT_VERSION = 1
+EMBEDDING_DIM = 384  # all-MiniLM-L6-v2
+TEXT_FIELDS = [
+    "bot_a_connection",
+    "bot_a_shifted_connection",
+    "bot_b_critique",
+    "bot_a_refined",
+    "bot_c_decision",
+]
+
+
+class StringTableWriter:
+    """Appends UTF-8 strings to ``<name>.utf8`` and records their offsets."""
+
+    def __init__(self, directory: str, name: str):
+        self.directory = directory
+        self.name = name
+        self.blob = open(os.path.join(directory, f"{name}.utf8"), "wb")
+        self.offsets = array("q", [0])
+
+    def append(self, text: Optional[str]):
+        data = (text or "").encode("utf-8")
+        self.blob.write(data)
+        self.offsets.append(self.offsets[-1] + len(data))
+
+    def close(self):
+        self.blob.close()
+        np.save(os.path.join(self.directory, f"{self.name}.offsets.npy"), np.frombuffer(self.offsets, dtype=np.int64))
+
+
+class StringTable:
+    """Memory-mapped, random-access view of a string table."""
+
+    def __init__(self, directory: str, name: str):
+        self.offsets = np.load(os.path.join(directory, f"{name}.offsets.npy"), mmap_mode="r")
+        blob_path = os.path.join(directory, f"{name}.utf8")
+        if os.path.getsize(blob_path):
+            self.blob = np.memmap(blob_path, dtype=np.uint8, mode="r")
+        else:
+            self.blob = np.zeros(0, dtype=np.uint8)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        return self.blob[self.offsets[i]:self.offsets[i + 1]].tobytes().decode("utf-8")
+
+    def lengths(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+
+class _Codes:
+    """Interns repeated strings (interventions, perspectives) as small integer codes."""
+
+    def __init__(self):
+        self.values: List[str] = []
+        self._index: Dict[str, int] = {}
+
+    def code(self, value: Optional[str]) -> int:
+        if not value:
+            return -1
+        if value not in self._index:
+            self._index[value] = len(self.values)
+            self.values.append(value)
+        return self._index[value]
+
+
+def export(log_file: str, out_dir: str, embed: bool = False, batch_size: int = 256) -> Dict:
+    """Flattens the log store into ``out_dir`` and returns the manifest."""
+    store = open_log_store(log_file, read_only=True)
+    os.makedirs(out_dir, exist_ok=True)
+
+    # First pass only counts rows so fixed-width columns can be written
+    # straight into preallocated memory-mapped files.
+    num_sessions = 0
+    num_iterations = 0
+    for session in store.iter_sessions():
+        num_sessions += 1
+        num_iterations += len(session["iterations"])
+
+    def column(name, dtype, fill):
+        arr = np.lib.format.open_memmap(os.path.join(out_dir, f"{name}.npy"), mode="w+",
+                                        dtype=dtype, shape=(num_iterations,))
+        arr[:] = fill
+        return arr
+
+    session_index = column("session_index", np.int32, -1)
+    iteration = column("iteration", np.int32, 0)
+    novelty_score = column("novelty_score", np.float32, np.nan)
+    duration = column("duration_seconds", np.float32, np.nan)
+    intervention = column("intervention", np.int16, -1)
+    perspective = column("perspective_shift", np.int16, -1)
+    embeddings = np.lib.format.open_memmap(os.path.join(out_dir, "embeddings.npy"), mode="w+",
+                                           dtype=np.float32, shape=(num_iterations, EMBEDDING_DIM))
+    has_embedding = column("has_embedding", np.bool_, False)
+
+    session_ids = StringTableWriter(out_dir, "session_id")
+    topic_a = StringTableWriter(out_dir, "topic_a")
+    topic_b = StringTableWriter(out_dir, "topic_b")
+    texts = {field: StringTableWriter(out_dir, field) for field in TEXT_FIELDS}
+    interventions = _Codes()
+    perspectives = _Codes()
+
+    model = None
+    pending_rows, pending_texts = [], []
+
+    def flush_pending():
+        if pending_rows:
+            embeddings[pending_rows] = model.encode(pending_texts, batch_size=batch_size)
+            has_embedding[pending_rows] = True
+            pending_rows.clear()
+            pending_texts.clear()
+
+    if embed:
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
+
+    row = 0
+    for s, session in enumerate(store.iter_sessions()):
+        topics = session.get("topics") or []
+        session_ids.append(session["session_id"])
+        topic_a.append(topics[0] if len(topics) > 0 else None)
+        topic_b.append(topics[1] if len(topics) > 1 else None)
+
+        for it in session["iterations"]:
+            session_index[row] = s
+            iteration[row] = it.get("iteration", 0)
+            if it.get("novelty_score") is not None:
+                novelty_score[row] = it["novelty_score"]
+            if it.get("duration_seconds") is not None:
+                duration[row] = it["duration_seconds"]
+            intervention[row] = interventions.code(it.get("intervention"))
+            perspective[row] = perspectives.code(it.get("perspective_shift"))
+            for field, writer in texts.items():
+                writer.append(it.get(field))
+
+            if it.get("connection_embedding") is not None:
+                embeddings[row] = decode_vector(it["connection_embedding"])
+                has_embedding[row] = True
+            elif model is not None and it.get("bot_a_connection"):
+                pending_rows.append(row)
+                pending_texts.append(it["bot_a_connection"])
+                if len(pending_rows) >= batch_size:
+                    flush_pending()
+            row += 1
+    if model is not None:
+        flush_pending()
+
+    for writer in [session_ids, topic_a, topic_b, *texts.values()]:
+        writer.close()
+    for arr in [session_index, iteration, novelty_score, duration, intervention, perspective, embeddings, has_embedding]:
+        arr.flush()
+
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "source": os.path.abspath(log_file),
+        "num_sessions": num_sessions,
+        "num_iterations": num_iterations,
+        "embedding_dim": EMBEDDING_DIM,
+        "text_fields": TEXT_FIELDS,
+        "interventions": interventions.values,
+        "perspectives": perspectives.values,
+    }
+    with open(os.path.join(out_dir, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+class Corpus:
+    """Read-only, memory-mapped view of an export directory."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        with open(os.path.join(directory, "manifest.json")) as f:
+            self.manifest = json.load(f)
+        if self.manifest["format_version"] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported export format version {self.manifest['format_version']}")
+
+    def column(self, name: str) -> np.ndarray:
+        return np.load(os.path.join(self.directory, f"{name}.npy"), mmap_mode="r")
+
+    def strings(self, name: str) -> StringTable:
+        return StringTable(self.directory, name)
+
+    def embeddings(self) -> np.ndarray:
+        return self.column("embeddings")
+
+
+def mean_novelty_per_iteration(corpus: Corpus) -> List[Dict]:
+    iteration = np.asarray(corpus.column("iteration"))
+    novelty = np.asarray(corpus.column("novelty_score"))
+    scored = ~np.isnan(novelty)
+    if not scored.any():
+        return []
+    counts = np.bincount(iteration[scored])
+    sums = np.bincount(iteration[scored], weights=novelty[scored])
+    return [
+        {"iteration": int(i), "count": int(counts[i]), "mean_novelty": float(sums[i] / counts[i])}
+        for i in np.flatnonzero(counts)
+    ]
+
+
+def intervention_effectiveness(corpus: Corpus) -> List[Dict]:
+    """Novelty of the following iteration, grouped by the intervention applied."""
+    session_index = np.asarray(corpus.column("session_index"))
+    novelty = np.asarray(corpus.column("novelty_score"))
+    intervention = np.asarray(corpus.column("intervention"))
+
+    # Rows are stored session by session in iteration order, so the next
+    # iteration of row i is row i + 1 whenever both belong to the same session.
+    follows = (session_index[1:] == session_index[:-1]) & ~np.isnan(novelty[1:])
+    codes = intervention[:-1][follows].astype(np.int64) + 1  # shift "none" (-1) to bucket 0
+    next_novelty = novelty[1:][follows]
+    if not codes.size:
+        return []
+
+    names = ["(none)"] + corpus.manifest["interventions"]
+    counts = np.bincount(codes, minlength=len(names))
+    sums = np.bincount(codes, weights=next_novelty, minlength=len(names))
+    baseline = sums[0] / counts[0] if counts[0] else float("nan")
+    results = []
+    for code in np.flatnonzero(counts):
+        mean = sums[code] / counts[code]
+        results.append({
+            "intervention": names[code],
+            "count": int(counts[code]),
+            "mean_next_novelty": float(mean),
+            "delta_vs_none": float(mean - baseline),
+        })
+    return results
+
+
+def perspective_shift_frequency(corpus: Corpus) -> Dict:
+    perspective = np.asarray(corpus.column("perspective_shift"))
+    iteration = np.asarray(corpus.column("iteration"))
+    shifted = perspective >= 0
+    names = corpus.manifest["perspectives"]
+    counts = np.bincount(perspective[shifted], minlength=len(names))
+    per_iteration_total = np.bincount(iteration)
+    per_iteration_shifts = np.bincount(iteration[shifted], minlength=len(per_iteration_total))
+    return {
+        "shift_rate": float(shifted.mean()) if shifted.size else 0.0,
+        "by_perspective": {names[i]: int(c) for i, c in enumerate(counts)},
+        "rate_by_iteration": {
+            int(i): float(per_iteration_shifts[i] / per_iteration_total[i])
+            for i in np.flatnonzero(per_iteration_total)
+        },
+    }
+
+
+QUERIES = {
+    "mean-novelty": mean_novelty_per_iteration,
+    "interventions": intervention_effectiveness,
+    "perspectives": perspective_shift_frequency,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Columnar export and analytics for discussion logs")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Export the log store to a columnar directory")
+    export_parser.add_argument("log_file")
+    export_parser.add_argument("out_dir")
+    export_parser.add_argument("--embed", action="store_true",
+                               help="Compute embeddings for iterations that were logged without one")
+    export_parser.add_argument("--batch-size", type=int, default=256)
+
+    query_parser = subparsers.add_parser("query", help="Run an aggregate query over an export")
+    query_parser.add_argument("export_dir")
+    query_parser.add_argument("query", choices=sorted(QUERIES))
+
+    args = parser.parse_args()
+    if args.command == "export":
+        try:
+            manifest = export(args.log_file, args.out_dir, embed=args.embed, batch_size=args.batch_size)
+        except ValueError as e:
+            parser.exit(1, f"{e}\n")
+        print(f"Exported {manifest['num_iterations']} iterations from "
+              f"{manifest['num_sessions']} sessions to {args.out_dir}")
+    else:
+        result = QUERIES[args.query](Corpus(args.export_dir))
+        print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Debate topics, bot personalities and prompts shared by the Flask and ASGI apps."""
+import random
+
+# Default debate topics
+DEBATE_TOPICS = [
+    "Should artificial intelligence be regulated?",
+    "Is social media beneficial or harmful to society?",
+    "Should cryptocurrency replace traditional banking?",
+    "Does technology improve human relationships?",
+    "Should governments impose stricter climate change policies?",
+]
+
+# Opposing perspectives for debates
+DEBATE_POSITIONS = [
+    ("I strongly support this stance", "I completely oppose this viewpoint"),
+    ("This approach is the future", "This approach is deeply flawed"),
+    ("The economic benefits outweigh the risks", "The ethical concerns are too great"),
+    ("We must embrace this technology", "We should be cautious about this technology"),
+]
+
+# Add at the top of your file
+BOT_PERSONALITIES = [
+    {
+        "name": "The Logical Analyst",
+        "style": "Using data-driven arguments and precise logical reasoning",
+        "tone": "methodical and authoritative"
+    },
+    {
+        "name": "The Passionate Advocate",
+        "style": "Drawing on emotional appeals and real-world implications",
+        "tone": "passionate and compelling"
+    },
+    {
+        "name": "The Strategic Debater",
+        "style": "Employing rhetorical techniques and strategic argumentation",
+        "tone": "confident and persuasive"
+    },
+    {
+        "name": "The Revolutionary Thinker",
+        "style": "Challenging conventional wisdom with bold new perspectives",
+        "tone": "bold and provocative"
+    }
+]
+
+# Mediator selects a debate topic and assigns positions
+def mediator_choose_topic(user_topic=None):
+    topic = user_topic if user_topic else random.choice(DEBATE_TOPICS)
+    position_a, position_b = random.choice(DEBATE_POSITIONS)
+    return topic, position_a, position_b
+
+def bot_a_prompt(topic, position_a, personality):
+    prompt = f"""
+    You are {personality['name']}, a fierce debater {personality['style']}.
+    Speaking with {personality['tone']}, deliver a powerful opening argument.
+    
+    Topic: '{topic}'
+    Your position: '{position_a}'
+    
+    IMPORTANT DEBATE RULES:
+    - Start with a bold, attention-grabbing statement
+    - Use assertive language ("I assert", "It is clear", "The evidence proves")
+    - Never apologize or hedge your position
+    - Speak with absolute conviction
+    - Challenge opposing viewpoints preemptively
+    - End with a strong concluding statement
+    
+    Make your argument compelling and authoritative.
+    """
+    return prompt
+
+def bot_b_prompt(topic, position_b, argument_a, personality):
+    prompt = f"""
+    You are {personality['name']}, a masterful debater {personality['style']}.
+    Speaking with {personality['tone']}, demolish your opponent's argument.
+    
+    Topic: '{topic}'
+    Your position: '{position_b}'
+    Opponent's argument: '{argument_a}'
+    
+    IMPORTANT DEBATE RULES:
+    - Begin with a powerful rebuttal
+    - Directly attack the weakest points in their argument
+    - Use decisive language ("This is fundamentally flawed", "The facts clearly show")
+    - Never concede points or apologize
+    - Speak with unwavering confidence
+    - End by reinforcing your superior position
+    
+    Deliver a devastating counterargument that leaves no room for doubt.
+    """
+    return prompt
+
+def compromise_prompt(topic, argument_a, argument_b):
+    prompt = f"""
+    The debate topic is '{topic}'.
+    Bot A argued: '{argument_a}'
+    Bot B counter-argued: '{argument_b}'
+
+    - Your task is to generate a **compromise** between these two perspectives.
+    - The compromise should acknowledge the strengths of both arguments while suggesting a balanced resolution.
+    """
+    return prompt
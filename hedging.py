@@ -0,0 +1,334 @@
+"""Hedged, cancellable chat requests against one or more Ollama backends.
+
+A request goes to the primary backend as a stream. If it has produced no
+token within a threshold taken from the observed time-to-first-token
+percentile, a duplicate is sent to a hedge backend (another host, or another
+model). Whichever attempt streams first wins and the other is cancelled,
+which closes its HTTP stream so the backend stops generating. A token-bucket
+budget caps hedges to a fraction of all requests, so a slow backend cannot
+double the load on the rest.
+
+Configured through the environment:
+
+    OLLAMA_HEDGE_HOSTS       comma-separated hosts to hedge to (default: none)
+    OLLAMA_HEDGE_MODEL       model for hedged attempts (default: same model;
+                             set alone, hedges go to the primary host)
+    OLLAMA_HEDGE_PERCENTILE  first-token percentile that triggers a hedge (95)
+    OLLAMA_HEDGE_BUDGET      maximum extra requests as a fraction of all (0.1)
+
+With neither OLLAMA_HEDGE_HOSTS nor OLLAMA_HEDGE_MODEL set, requests are
+never hedged.
+"""
+import asyncio
+import itertools
+import logging
+import os
+import queue
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+import ollama
+
+
+class Backend:
+    """An Ollama host and the model to ask for there."""
+
+    def __init__(self, host: str, model: str = "llama2"):
+        self.host = host
+        self.model = model
+
+    def __repr__(self):
+        return f"Backend({self.host!r}, {self.model!r})"
+
+
+def backends_from_env(host: str, model: str = "llama2") -> List[Backend]:
+    """The primary backend followed by the hedge backends configured in the environment."""
+    hedge_model = os.environ.get("OLLAMA_HEDGE_MODEL", model)
+    hosts = [h.strip() for h in os.environ.get("OLLAMA_HEDGE_HOSTS", "").split(",") if h.strip()]
+    if not hosts and hedge_model != model:
+        hosts = [host]
+    return [Backend(host, model)] + [Backend(h, hedge_model) for h in hosts]
+
+
+class LatencyTracker:
+    """Sliding window of time-to-first-token samples."""
+
+    def __init__(self, window: int = 500, min_samples: int = 20):
+        self.min_samples = min_samples
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """The p-th percentile, or None until enough samples have been seen."""
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+class HedgeBudget:
+    """Token bucket: each request earns ``ratio`` of a hedge, at most ``burst`` are saved up."""
+
+    def __init__(self, ratio: float = 0.1, burst: float = 5.0):
+        self.ratio = ratio
+        self.burst = burst
+        self._tokens = burst
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            if self._tokens < 1.0:
+                return False
+            self._tokens -= 1.0
+            return True
+
+
+class _HedgingPolicy:
+    """When and where to hedge; shared by the threaded and the asyncio clients."""
+
+    def __init__(
+        self,
+        backends: List[Backend],
+        percentile: float = 95.0,
+        budget: float = 0.1,
+        initial_delay: float = 10.0,
+        min_delay: float = 0.1,
+    ):
+        if not backends:
+            raise ValueError("At least one backend is required")
+        self.backends = list(backends)
+        self.percentile = percentile
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.latency = LatencyTracker()
+        self.budget = HedgeBudget(ratio=budget)
+        self._hedge_targets = itertools.cycle(self.backends[1:] or self.backends)
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "hedged": 0, "hedge_wins": 0, "budget_exhausted": 0, "cancelled": 0}
+
+    @classmethod
+    def from_env(cls, host: str, model: str = "llama2", **kwargs):
+        return cls(
+            backends_from_env(host, model),
+            percentile=float(os.environ.get("OLLAMA_HEDGE_PERCENTILE", 95)),
+            budget=float(os.environ.get("OLLAMA_HEDGE_BUDGET", 0.1)),
+            **kwargs
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return len(self.backends) > 1
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds without a token before hedging, or None if hedging is off."""
+        if not self.enabled:
+            return None
+        threshold = self.latency.percentile(self.percentile)
+        return self.initial_delay if threshold is None else max(self.min_delay, threshold)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return dict(self._stats)
+
+    def _count(self, name: str, n: int = 1):
+        with self._lock:
+            self._stats[name] += n
+
+    def _begin(self):
+        self._count("requests")
+        self.budget.deposit()
+
+    def _next_hedge(self) -> Optional[Backend]:
+        if not self.budget.try_spend():
+            self._count("budget_exhausted")
+            return None
+        self._count("hedged")
+        with self._lock:
+            return next(self._hedge_targets)
+
+    def _won(self, attempt, primary):
+        # The threshold is a percentile of the primary's time to first token.
+        # A primary that lost to a hedge is still counted, at the time it had
+        # waited when it lost (at least the hedge delay). Sampling only the
+        # winners, each from its own start, would drop the slow tail and let
+        # the threshold drift down until only the budget limits hedging.
+        if primary.error is None:
+            self.latency.observe(attempt.first_token - primary.started)
+        if attempt.hedge:
+            self._count("hedge_wins")
+            logging.info(f"Hedged request to {attempt.backend} answered first")
+
+
+class _Attempt:
+    def __init__(self, backend: Backend, hedge: bool):
+        self.backend = backend
+        self.hedge = hedge
+        self.started = time.monotonic()
+        self.first_token = None
+        self.cancelled = threading.Event()
+        self.finished = threading.Event()
+        self.text = None
+        self.error = None
+
+
+class HedgedChat(_HedgingPolicy):
+    """Blocking hedged chat; each attempt streams on its own daemon thread.
+
+    A cancelled attempt closes its stream when its next chunk arrives; an
+    attempt that is stuck without any output is abandoned to the client timeout.
+    """
+
+    def __init__(self, backends: List[Backend], timeout: float = 120, client_kwargs: Optional[Dict] = None, **kwargs):
+        super().__init__(backends, **kwargs)
+        self.clients = {
+            b.host: ollama.Client(host=b.host, timeout=timeout, **(client_kwargs or {})) for b in self.backends
+        }
+
+    def chat(self, messages: List[Dict], options: Optional[Dict] = None) -> str:
+        """Returns the text of the first attempt to stream a token."""
+        self._begin()
+        events = queue.Queue()
+        attempts = [self._launch(self.backends[0], False, messages, options, events)]
+        delay = self.hedge_delay()
+        winner, failed = None, 0
+        while winner is None:
+            timeout = None if delay is None else max(0.0, attempts[0].started + delay - time.monotonic())
+            try:
+                kind, attempt = events.get(timeout=timeout)
+            except queue.Empty:
+                delay = None
+                backend = self._next_hedge()
+                if backend is not None:
+                    attempts.append(self._launch(backend, True, messages, options, events))
+                continue
+            if kind == "token":
+                winner = attempt
+            else:
+                failed += 1
+                if failed == len(attempts):
+                    raise attempt.error
+
+        for attempt in attempts:
+            if attempt is not winner and not attempt.finished.is_set():
+                attempt.cancelled.set()
+                self._count("cancelled")
+        self._won(winner, attempts[0])
+        winner.finished.wait()
+        if winner.error is not None:
+            raise winner.error
+        return winner.text
+
+    def _launch(self, backend, hedge, messages, options, events) -> _Attempt:
+        attempt = _Attempt(backend, hedge)
+        threading.Thread(
+            target=self._stream, args=(attempt, messages, options, events), name="hedged-chat", daemon=True
+        ).start()
+        return attempt
+
+    def _stream(self, attempt, messages, options, events):
+        stream = None
+        parts = []
+        try:
+            stream = self.clients[attempt.backend.host].chat(
+                model=attempt.backend.model, messages=messages, options=options, stream=True
+            )
+            for chunk in stream:
+                if attempt.cancelled.is_set():
+                    return
+                if attempt.first_token is None:
+                    attempt.first_token = time.monotonic()
+                    events.put(("token", attempt))
+                parts.append(chunk["message"]["content"])
+            attempt.text = "".join(parts)
+        except Exception as e:
+            attempt.error = e
+            events.put(("error", attempt))
+        finally:
+            if stream is not None:
+                stream.close()  # Drops the connection, so the backend stops generating
+            attempt.finished.set()
+
+
+class AsyncHedgedChat(_HedgingPolicy):
+    """asyncio hedged chat; losing attempts are cancelled outright, as is
+    everything in flight when the caller itself is cancelled."""
+
+    def __init__(self, backends: List[Backend], timeout: float = 120, client_kwargs: Optional[Dict] = None, **kwargs):
+        super().__init__(backends, **kwargs)
+        self.clients = {
+            b.host: ollama.AsyncClient(host=b.host, timeout=timeout, **(client_kwargs or {})) for b in self.backends
+        }
+
+    async def chat(self, messages: List[Dict], options: Optional[Dict] = None) -> str:
+        """Returns the text of the first attempt to stream a token."""
+        self._begin()
+        events = asyncio.Queue()
+        tasks = {}
+        primary = self._launch(self.backends[0], False, messages, options, events, tasks)
+        delay = self.hedge_delay()
+        winner, failed = None, 0
+        try:
+            while winner is None:
+                timeout = None if delay is None else max(0.0, primary.started + delay - time.monotonic())
+                try:
+                    kind, attempt = await asyncio.wait_for(events.get(), timeout)
+                except asyncio.TimeoutError:
+                    delay = None
+                    backend = self._next_hedge()
+                    if backend is not None:
+                        self._launch(backend, True, messages, options, events, tasks)
+                    continue
+                if kind == "token":
+                    winner = attempt
+                else:
+                    failed += 1
+                    if failed == len(tasks):
+                        raise attempt.error
+
+            for attempt, task in tasks.items():
+                if attempt is not winner and not task.done():
+                    task.cancel()
+                    self._count("cancelled")
+            self._won(winner, primary)
+            return await tasks[winner]
+        finally:
+            for task in tasks.values():
+                task.cancel()
+
+    def _launch(self, backend, hedge, messages, options, events, tasks) -> _Attempt:
+        attempt = _Attempt(backend, hedge)
+        task = asyncio.ensure_future(self._stream(attempt, messages, options, events))
+        # Losers' errors are reported through events; don't warn about them on GC
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        tasks[attempt] = task
+        return attempt
+
+    async def _stream(self, attempt, messages, options, events) -> str:
+        parts = []
+        try:
+            stream = await self.clients[attempt.backend.host].chat(
+                model=attempt.backend.model, messages=messages, options=options, stream=True
+            )
+            async for chunk in stream:
+                if attempt.first_token is None:
+                    attempt.first_token = time.monotonic()
+                    events.put_nowait(("token", attempt))
+                parts.append(chunk["message"]["content"])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            attempt.error = e
+            events.put_nowait(("error", attempt))
+            raise
+        return "".join(parts)
@@ -0,0 +1,390 @@
+"""Persistence for Socratic discussion sessions.
+
+Three formats are supported; open_log_store() picks one from the file name:
+
+* ``.json``  -- ``{"discussions": [session, ...]}``, rewritten on every save
+  (LogStore). Human readable, the historical format.
+* ``.jsonl`` -- append-only records (JsonlLogStore). Saves cost O(record)
+  time and memory however large the log grows, for long-running daemons.
+* ``.archive`` -- zstd-compressed, per-session blocks with an offset index
+  (see transcript_archive.py), for storing and scanning large corpora.
+  Read-only; built from another log with ``transcript_archive.py build``.
+"""
+import base64
+import itertools
+import json
+import logging
+import os
+import re
+import tempfile
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+
+def _to_json(value):
+    """json.dump fallback for NumPy scalars and arrays (e.g. float32 novelty scores)."""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def encode_vector(vector) -> str:
+    """Packs an embedding as base64 float32, about 5x smaller than a JSON float list."""
+    return base64.b64encode(np.asarray(vector, dtype="<f4").tobytes()).decode("ascii")
+
+
+def decode_vector(value) -> Optional[np.ndarray]:
+    """Inverse of encode_vector; also accepts the float lists written by older logs."""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return np.frombuffer(base64.b64decode(value), dtype="<f4").astype(np.float32)
+    return np.asarray(value, dtype=np.float32)
+
+
+def _file_mode(path: str) -> int:
+    """Permissions to give a rewritten file: the current ones, else rw-r--r--."""
+    try:
+        return os.stat(path).st_mode & 0o777
+    except FileNotFoundError:
+        return 0o644
+
+
+_DISCUSSIONS_START = re.compile(r'\s*\{\s*"discussions"\s*:\s*\[')
+_SEPARATOR = re.compile(r'[\s,]*')
+
+
+def recover_sessions(text: str) -> List[Dict]:
+    """The complete sessions at the start of a truncated ``{"discussions": [...]}`` log.
+
+    A write cut off mid-file (as in older logs saved without an atomic
+    rename) leaves every session before the cut intact; those are returned
+    and the partial one is dropped.
+    """
+    match = _DISCUSSIONS_START.match(text)
+    if not match:
+        return []
+    decoder = json.JSONDecoder()
+    sessions = []
+    pos = match.end()
+    while True:
+        pos = _SEPARATOR.match(text, pos).end()
+        try:
+            session, pos = decoder.raw_decode(text, pos)
+        except json.JSONDecodeError:
+            break
+        if isinstance(session, dict) and "session_id" in session:
+            sessions.append(session)
+    return sessions
+
+
+class LogStore:
+    """Stores sessions as ``{"discussions": [session, ...]}`` in one JSON file.
+
+    Writes go to a temporary file that is atomically renamed over the log, so
+    a crash mid-write can no longer leave a truncated file behind.
+    """
+
+    def __init__(self, log_file: str = "discussion_logs.json"):
+        self.log_file = log_file
+
+    def load(self) -> Dict:
+        try:
+            with open(self.log_file, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"discussions": []}
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Log file {self.log_file} is corrupt: {e}") from e
+
+    def _recover(self, path: str) -> Dict:
+        with open(path, 'r') as f:
+            sessions = recover_sessions(f.read())
+        logging.warning(f"Recovered {len(sessions)} complete sessions from the corrupt log {path}")
+        return {"discussions": sessions}
+
+    def _load_for_write(self) -> Dict:
+        """load(), but a corrupt log is moved aside and its complete sessions kept."""
+        try:
+            return self.load()
+        except ValueError as e:
+            # Keep the damaged file around instead of silently overwriting it
+            backup = f"{self.log_file}.corrupt-{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            os.replace(self.log_file, backup)
+            logging.error(f"{e}; moved to {backup}")
+            return self._recover(backup)
+
+    def iter_sessions(self) -> Iterator[Dict]:
+        try:
+            all_logs = self.load()
+        except ValueError:
+            all_logs = self._recover(self.log_file)
+        yield from all_logs["discussions"]
+
+    def get_session(self, session_id: str) -> Optional[Dict]:
+        for session in self.iter_sessions():
+            if session["session_id"] == session_id:
+                return session
+        return None
+
+    def save_session(self, session_log: Dict):
+        """Insert or replace a session by session_id.
+
+        If session_log has no "iterations" key, the stored iterations are kept.
+        """
+        all_logs = self._load_for_write()
+        self._upsert(all_logs, session_log)
+        self._write(all_logs)
+
+    def save_progress(self, session_log: Dict, fields: Dict):
+        """Checkpoints new fields of the in-progress iteration.
+
+        session_log["in_progress"] already holds them; this format saves the
+        whole session.
+        """
+        self.save_session(session_log)
+
+    def append_iteration(self, session_log: Dict, iteration_log: Dict, new_fields: Optional[Dict] = None):
+        """Saves the session header and adds a completed iteration to it.
+
+        new_fields (the part not yet passed to save_progress) only matters to
+        stores that append; this one always writes iteration_log.
+        """
+        all_logs = self._load_for_write()
+        stored = self._upsert(all_logs, session_log)
+        if not any(it.get("iteration") == iteration_log["iteration"] for it in stored["iterations"]):
+            stored["iterations"].append(iteration_log)
+        self._write(all_logs)
+
+    def _upsert(self, all_logs: Dict, session_log: Dict) -> Dict:
+        for i, log in enumerate(all_logs["discussions"]):
+            if log["session_id"] == session_log["session_id"]:
+                session = dict(session_log)
+                session.setdefault("iterations", log.get("iterations", []))
+                all_logs["discussions"][i] = session
+                return session
+        session = dict(session_log)
+        session.setdefault("iterations", [])
+        all_logs["discussions"].append(session)
+        return session
+
+    def update_iterations(self, updates: Dict[Tuple[str, int], Dict]) -> int:
+        """Merges fields into iterations keyed by (session_id, iteration number).
+
+        Dict-valued fields are merged key by key, so results written under
+        different names accumulate. Returns the number of iterations updated.
+        """
+        all_logs = self._load_for_write()
+        updated = 0
+        for session in all_logs["discussions"]:
+            for iteration in session["iterations"]:
+                fields = updates.get((session["session_id"], iteration.get("iteration")))
+                if not fields:
+                    continue
+                for field, value in fields.items():
+                    if isinstance(value, dict) and isinstance(iteration.get(field), dict):
+                        iteration[field].update(value)
+                    else:
+                        iteration[field] = value
+                updated += 1
+        self._write(all_logs)
+        return updated
+
+    def _write(self, all_logs: Dict):
+        directory = os.path.dirname(os.path.abspath(self.log_file))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            # mkstemp creates the file 0600; keep the log readable as before
+            os.chmod(tmp_path, _file_mode(self.log_file))
+            with os.fdopen(fd, 'w') as f:
+                json.dump(all_logs, f, indent=2, default=_to_json)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.log_file)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+
+class JsonlLogStore:
+    """Append-only log: one JSON record per line.
+
+    ``{"record": "session", ...}`` carries the session header (topics, status,
+    checkpoint state); the latest one for a session wins.
+    ``{"record": "iteration", "session_id": ..., ...}`` is a completed iteration.
+    ``{"record": "progress", "session_id": ..., "fields": {...}}`` adds fields to
+    the session's in-progress iteration, so a checkpoint costs one step's text;
+    with ``"complete": true`` the in-progress iteration becomes a completed one.
+    """
+
+    def __init__(self, log_file: str = "discussion_logs.jsonl"):
+        self.log_file = log_file
+
+    def _append(self, records):
+        data = "".join(json.dumps(record, default=_to_json) + "\n" for record in records)
+        with open(self.log_file, 'ab+') as f:
+            self._repair_tail(f)
+            f.write(data.encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _repair_tail(self, f):
+        """Makes sure the log ends with a newline before appending.
+
+        A write interrupted by a crash leaves a torn last line; appending to it
+        would fuse the next record onto the garbage and lose that record too.
+        The torn line is dropped, or just terminated if it is a complete record.
+        """
+        end = f.seek(0, os.SEEK_END)
+        if end == 0:
+            return
+        f.seek(end - 1)
+        if f.read(1) == b"\n":
+            return
+        start = end
+        while start > 0:
+            step = min(start, 65536)
+            f.seek(start - step)
+            newline = f.read(step).rfind(b"\n")
+            if newline >= 0:
+                start = start - step + newline + 1
+                break
+            start -= step
+        f.seek(start)
+        try:
+            json.loads(f.read(end - start))
+            f.write(b"\n")
+        except ValueError:
+            logging.warning(f"Dropping a torn record at the end of {self.log_file}")
+            f.truncate(start)
+
+    @staticmethod
+    def _header(session_log: Dict) -> Dict:
+        header = {k: v for k, v in session_log.items() if k != "iterations"}
+        header["record"] = "session"
+        return header
+
+    def save_session(self, session_log: Dict):
+        records = [
+            dict(iteration, record="iteration", session_id=session_log["session_id"])
+            for iteration in session_log.get("iterations", [])
+        ]
+        records.append(self._header(session_log))
+        self._append(records)
+
+    def save_progress(self, session_log: Dict, fields: Dict):
+        self._append([{"record": "progress", "session_id": session_log["session_id"], "fields": fields}])
+
+    def append_iteration(self, session_log: Dict, iteration_log: Dict, new_fields: Optional[Dict] = None):
+        """With new_fields, the rest of iteration_log was already saved by save_progress."""
+        if new_fields is None:
+            record = dict(iteration_log, record="iteration", session_id=session_log["session_id"])
+        else:
+            record = {"record": "progress", "session_id": session_log["session_id"], "fields": new_fields,
+                      "complete": True}
+        self._append([record, self._header(session_log)])
+
+    def _records(self) -> Iterator[Dict]:
+        try:
+            with open(self.log_file, 'r') as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError:
+                        logging.warning(f"Skipping torn record in {self.log_file}")
+        except FileNotFoundError:
+            return
+
+    @staticmethod
+    def _apply(session: Dict, record: Dict):
+        kind = record.pop("record")
+        if kind == "session":
+            record["iterations"] = session.get("iterations", {})
+            session.clear()
+            session.update(record)
+        elif kind == "progress":
+            progress = dict(session.get("in_progress") or {}, **record["fields"])
+            if record.get("complete"):
+                session.setdefault("iterations", {})[progress.get("iteration")] = progress
+                progress = None
+            session["in_progress"] = progress
+        else:
+            record.pop("session_id")
+            session.setdefault("iterations", {})[record.get("iteration")] = record
+
+    @staticmethod
+    def _finish(session: Dict) -> Dict:
+        iterations = session.get("iterations", {})
+        session["iterations"] = [iterations[k] for k in sorted(iterations, key=lambda k: (k is None, k))]
+        return session
+
+    def get_session(self, session_id: str) -> Optional[Dict]:
+        session = None
+        for record in self._records():
+            if record.get("session_id") == session_id:
+                session = session if session is not None else {}
+                self._apply(session, record)
+        return self._finish(session) if session is not None and "session_id" in session else None
+
+    def iter_sessions(self) -> Iterator[Dict]:
+        """Yields each session once its last record has been read.
+
+        A first pass notes where each session's last record is, so records
+        appended after completion (e.g. by update_iterations) are included.
+        Memory is bounded by the number of sessions whose records interleave,
+        plus one integer per session, not by the size of the log.
+        """
+        last_record = {}
+        count = 0
+        for count, record in enumerate(self._records(), 1):
+            last_record[record.get("session_id")] = count
+        open_sessions = {}
+        # Records appended after the first pass are left for the next reader
+        for n, record in enumerate(itertools.islice(self._records(), count), 1):
+            session_id = record.get("session_id")
+            session = open_sessions.setdefault(session_id, {})
+            self._apply(session, record)
+            if last_record[session_id] == n:
+                del open_sessions[session_id]
+                if "session_id" in session:
+                    yield self._finish(session)
+
+    def update_iterations(self, updates: Dict[Tuple[str, int], Dict]) -> int:
+        """Appends updated copies of the matching iterations (latest record wins)."""
+        records = []
+        for session in self.iter_sessions():
+            for iteration in session["iterations"]:
+                fields = updates.get((session["session_id"], iteration.get("iteration")))
+                if not fields:
+                    continue
+                for field, value in fields.items():
+                    if isinstance(value, dict) and isinstance(iteration.get(field), dict):
+                        iteration[field].update(value)
+                    else:
+                        iteration[field] = value
+                records.append(dict(iteration, record="iteration", session_id=session["session_id"]))
+        if records:
+            self._append(records)
+        return len(records)
+
+
+def open_log_store(log_file: str, read_only: bool = False):
+    """Returns the store matching the file extension (.archive, .jsonl or .json).
+
+    Archives can only be opened with read_only=True.
+    """
+    if log_file.endswith(".archive"):
+        if not read_only:
+            raise ValueError(
+                f"{log_file} is a read-only transcript archive; log to a .jsonl file and "
+                f"archive it with: python transcript_archive.py build <log>.jsonl {log_file}"
+            )
+        from transcript_archive import ArchiveLogStore  # needs the zstandard package
+        return ArchiveLogStore(log_file)
+    if log_file.endswith(".jsonl"):
+        return JsonlLogStore(log_file)
+    return LogStore(log_file)
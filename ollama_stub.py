@@ -0,0 +1,308 @@
+"""Local stand-in for an Ollama server, used by the benchmark suite.
+
+Implements the parts of the Ollama HTTP API this project talks to:
+
+* ``POST /api/chat`` (streaming NDJSON and non-streaming JSON)
+* ``GET  /api/tags``
+
+Generation speed, first-token latency and failures are configurable so runs
+are reproducible and independent of the shared host at 207.211.161.65.
+
+Usage:
+    python ollama_stub.py --port 11435 --tokens-per-second 40 \\
+        --latency lognormal:-1.5,0.5 --failure-rate 0.02
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+# Vocabulary for the generated prose; roughly the register llama2 produces
+# for this project's prompts, so text-dependent code (tokenizing, embedding,
+# JSON size) sees realistic input.
+WORDS = (
+    "the argument connection evidence perspective analogy history culture "
+    "structure function symbol meaning society technology ethics economy "
+    "clearly therefore however moreover indeed because although while "
+    "demonstrates suggests reveals challenges strengthens reframes bridges "
+    "between both these their this that which where when how why "
+    "powerful nuanced specific deeper broader critical logical creative "
+    "tradition innovation identity power conflict harmony change growth "
+    "is are was can should must will might could would of in on for with"
+).split()
+
+DECISION_PHRASES = [
+    "The refined version is the strongest argument.",
+    "The new connection is the strongest argument.",
+    "The improvement is negligible; the previous best argument stands.",
+]
+
+
+def generate_text(rng: random.Random, num_words: int) -> str:
+    """Generate deterministic pseudo-prose of roughly ``num_words`` words."""
+    sentences = []
+    remaining = num_words
+    while remaining > 0:
+        length = min(remaining, rng.randint(8, 20))
+        words = [rng.choice(WORDS) for _ in range(length)]
+        sentences.append(" ".join(words).capitalize() + ".")
+        remaining -= length
+    return " ".join(sentences)
+
+
+def parse_latency(spec: str):
+    """Parse a latency spec into a sampler returning seconds.
+
+    Supported forms: ``fixed:S``, ``uniform:LO,HI``, ``lognormal:MU,SIGMA``
+    and ``pareto:SCALE,ALPHA`` (heavy tail, for tail-latency experiments).
+    """
+    kind, _, params = spec.partition(":")
+    values = [float(v) for v in params.split(",")] if params else []
+    if kind == "fixed":
+        return lambda rng: values[0] if values else 0.0
+    if kind == "uniform":
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == "lognormal":
+        return lambda rng: rng.lognormvariate(values[0], values[1])
+    if kind == "pareto":
+        return lambda rng: values[0] * rng.paretovariate(values[1])
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+
+class StubConfig:
+    """Behaviour knobs for the stub server."""
+
+    def __init__(
+        self,
+        model: str = "llama2",
+        tokens_per_second: float = 50.0,
+        latency: str = "fixed:0.05",
+        response_words: int = 120,
+        failure_rate: float = 0.0,
+        hang_rate: float = 0.0,
+        hang_seconds: float = 30.0,
+        seed: int = 0,
+    ):
+        self.model = model
+        self.tokens_per_second = tokens_per_second
+        self.latency = latency
+        self.response_words = response_words
+        self.failure_rate = failure_rate
+        self.hang_rate = hang_rate
+        self.hang_seconds = hang_seconds
+        self.seed = seed
+
+    def to_dict(self) -> Dict:
+        return dict(vars(self))
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    server_version = "OllamaStub/1.0"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass  # Keep benchmark output clean
+
+    def _send_json(self, status: int, payload: Dict):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _chunk(self, payload: Dict):
+        line = (json.dumps(payload) + "\n").encode()
+        self.wfile.write(f"{len(line):X}\r\n".encode() + line + b"\r\n")
+        self.wfile.flush()
+
+    def do_GET(self):
+        if self.path == "/api/tags":
+            self._send_json(200, {"models": [{
+                "name": f"{self.server.config.model}:latest",
+                "model": f"{self.server.config.model}:latest",
+                "modified_at": _now(),
+                "size": 3826793677,
+                "digest": "stub",
+                "details": {"format": "gguf", "family": "llama"},
+            }]})
+        elif self.path == "/stub/stats":
+            self._send_json(200, self.server.stats())
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        if self.path != "/api/chat":
+            self._send_json(404, {"error": "not found"})
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        server = self.server
+        rng = server.request_rng()
+        server.request_started()
+        try:
+            if rng.random() < server.config.failure_rate:
+                server.count("failures")
+                self._send_json(500, {"error": "injected failure"})
+                return
+            if rng.random() < server.config.hang_rate:
+                server.count("hangs")
+                time.sleep(server.config.hang_seconds)
+            time.sleep(server.sample_latency(rng))
+
+            tokens = self._make_tokens(request, rng)
+            if request.get("stream", True):
+                self._stream(request, tokens)
+            else:
+                time.sleep(len(tokens) / server.config.tokens_per_second)
+                self._send_json(200, self._final(request, "".join(tokens), len(tokens)))
+        except (BrokenPipeError, ConnectionResetError):
+            server.count("disconnects")
+        finally:
+            server.request_finished()
+
+    def _make_tokens(self, request: Dict, rng: random.Random) -> List[str]:
+        config = self.server.config
+        num_words = config.response_words
+        num_predict = (request.get("options") or {}).get("num_predict")
+        if num_predict:
+            num_words = min(num_words, int(num_predict))
+
+        prompt = (request.get("messages") or [{}])[-1].get("content", "")
+        text = generate_text(rng, num_words)
+        if "Refined version:" in prompt:
+            text = rng.choice(DECISION_PHRASES) + " " + text
+        return [word + " " for word in text.split()]
+
+    def _stream(self, request: Dict, tokens: List[str]):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        delay = 1.0 / self.server.config.tokens_per_second
+        for token in tokens:
+            self._chunk({
+                "model": request.get("model", self.server.config.model),
+                "created_at": _now(),
+                "message": {"role": "assistant", "content": token},
+                "done": False,
+            })
+            time.sleep(delay)
+        self._chunk(self._final(request, "", len(tokens)))
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _final(self, request: Dict, content: str, eval_count: int) -> Dict:
+        return {
+            "model": request.get("model", self.server.config.model),
+            "created_at": _now(),
+            "message": {"role": "assistant", "content": content},
+            "done": True,
+            "done_reason": "stop",
+            "eval_count": eval_count,
+        }
+
+
+class OllamaStubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024  # Accept bursts of concurrent clients
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, config: Optional[StubConfig] = None):
+        super().__init__((host, port), StubHandler)
+        self.config = config or StubConfig()
+        self._rng = random.Random(self.config.seed)
+        self._sampler = parse_latency(self.config.latency)
+        self._lock = threading.Lock()
+        self._counters = {"requests": 0, "failures": 0, "hangs": 0, "disconnects": 0}
+        self._in_flight = 0
+        self._max_in_flight = 0
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def request_rng(self) -> random.Random:
+        # Derive a per-request generator so concurrent handlers stay
+        # deterministic with respect to arrival order.
+        with self._lock:
+            return random.Random(self._rng.getrandbits(64))
+
+    def sample_latency(self, rng: random.Random) -> float:
+        return max(0.0, self._sampler(rng))
+
+    def count(self, name: str):
+        with self._lock:
+            self._counters[name] += 1
+
+    def request_started(self):
+        with self._lock:
+            self._counters["requests"] += 1
+            self._in_flight += 1
+            self._max_in_flight = max(self._max_in_flight, self._in_flight)
+
+    def request_finished(self):
+        with self._lock:
+            self._in_flight -= 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return dict(self._counters, in_flight=self._in_flight, max_in_flight=self._max_in_flight)
+
+    def start(self) -> str:
+        """Serve in a background thread and return the base URL."""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self.url
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self._thread:
+            self._thread.join()
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ollama-compatible stub server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--model", default="llama2")
+    parser.add_argument("--tokens-per-second", type=float, default=50.0)
+    parser.add_argument("--latency", default="fixed:0.05",
+                        help="fixed:S | uniform:LO,HI | lognormal:MU,SIGMA | pareto:SCALE,ALPHA")
+    parser.add_argument("--response-words", type=int, default=120)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--hang-rate", type=float, default=0.0)
+    parser.add_argument("--hang-seconds", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    config = StubConfig(
+        model=args.model,
+        tokens_per_second=args.tokens_per_second,
+        latency=args.latency,
+        response_words=args.response_words,
+        failure_rate=args.failure_rate,
+        hang_rate=args.hang_rate,
+        hang_seconds=args.hang_seconds,
+        seed=args.seed,
+    )
+    server = OllamaStubServer(args.host, args.port, config)
+    print(f"Ollama stub listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStub server stopped.")
+
+
+if __name__ == "__main__":
+    main()
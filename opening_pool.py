@@ -0,0 +1,187 @@
+"""Warm pool of pre-generated opening arguments for the stock debate topics.
+
+Without a user topic, /generate draws from a small fixed space of
+(topic, positions) combinations. OpeningPool keeps a few fresh, unused
+openings per combination, generated in a background thread that only starts
+an LLM call while no live request is talking to the LLM, so /generate can
+usually skip the generation latency entirely.
+
+"Live" means requests tracked by this process's LiveTraffic. Calls from other
+worker processes, asgi_app.py or socratic_debate.py sharing the same backend
+are not seen, so the pool should only be enabled where this process is the
+backend's main user.
+"""
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Callable, Dict, Hashable, List, Optional
+
+
+class LiveTraffic:
+    """Counts in-flight LLM calls made on behalf of users."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.in_flight = 0
+        self.last_finished = 0.0
+
+    @contextmanager
+    def track(self):
+        if getattr(self._local, "background", False):
+            yield
+            return
+        with self._lock:
+            self.in_flight += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+                self.last_finished = time.monotonic()
+
+    @contextmanager
+    def background(self):
+        """Marks calls made by the current thread as background work."""
+        self._local.background = True
+        try:
+            yield
+        finally:
+            self._local.background = False
+
+    def is_idle(self, grace_seconds: float) -> bool:
+        with self._lock:
+            return self.in_flight == 0 and time.monotonic() - self.last_finished >= grace_seconds
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class OpeningPool:
+    def __init__(
+        self,
+        combinations: List[Hashable],
+        produce: Callable[..., Dict],
+        live_traffic: LiveTraffic,
+        size_per_combination: int = 2,
+        max_age_seconds: float = 3600,
+        idle_grace_seconds: float = 2.0,
+        poll_interval: float = 1.0,
+        max_pending_counters: int = 256,
+    ):
+        self.combinations = list(combinations)
+        self.produce = produce
+        self.live_traffic = live_traffic
+        self.size_per_combination = size_per_combination
+        self.max_age_seconds = max_age_seconds
+        self.idle_grace_seconds = idle_grace_seconds
+        self.poll_interval = poll_interval
+        self.max_pending_counters = max_pending_counters
+
+        self._lock = threading.Lock()
+        self._pool = {combination: deque() for combination in self.combinations}
+        # Openings already handed out, so a regenerated duplicate is never served twice
+        self._served = deque(maxlen=10000)
+        self._served_set = set()
+        # Pre-generated Bot B counters for openings that were just served
+        self._pending_counters = OrderedDict()
+        self._stop = threading.Event()
+        self._thread = None
+        self.stats = {"hits": 0, "misses": 0, "produced": 0, "expired": 0, "duplicates": 0}
+
+    def start(self):
+        """Starts the background thread; safe to call on every request."""
+        if self.size_per_combination <= 0 or self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="opening-pool", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def is_idle(self) -> bool:
+        """True once no live request has used the LLM for the grace period.
+
+        produce() should check it again between LLM calls, since live traffic
+        may have arrived since the pool decided to start.
+        """
+        return self.live_traffic.is_idle(self.idle_grace_seconds)
+
+    def take(self, combination: Hashable) -> Optional[Dict]:
+        """Pops a fresh opening for the combination, or returns None if none is ready."""
+        with self._lock:
+            entries = self._pool.get(combination)
+            while entries:
+                entry = entries.popleft()
+                if time.monotonic() - entry["created_at"] > self.max_age_seconds:
+                    self.stats["expired"] += 1
+                    continue
+                self.stats["hits"] += 1
+                self._mark_served(entry["argument_a"])
+                if entry.get("argument_b") is not None:
+                    self._pending_counters[_digest(entry["argument_a"])] = entry
+                    while len(self._pending_counters) > self.max_pending_counters:
+                        self._pending_counters.popitem(last=False)
+                return entry
+            self.stats["misses"] += 1
+            return None
+
+    def take_counter(self, argument_a: str) -> Optional[Dict]:
+        """Returns the pre-generated counter for an opening served from the pool."""
+        with self._lock:
+            return self._pending_counters.pop(_digest(argument_a or ""), None)
+
+    def _mark_served(self, argument_a: str):
+        if len(self._served) == self._served.maxlen:
+            self._served_set.discard(self._served[0])
+        digest = _digest(argument_a)
+        self._served.append(digest)
+        self._served_set.add(digest)
+
+    def _next_combination(self) -> Optional[Hashable]:
+        """The combination with the fewest fresh entries, if any is below target."""
+        now = time.monotonic()
+        with self._lock:
+            best, best_size = None, self.size_per_combination
+            for combination, entries in self._pool.items():
+                while entries and now - entries[0]["created_at"] > self.max_age_seconds:
+                    entries.popleft()
+                    self.stats["expired"] += 1
+                if len(entries) < best_size:
+                    best, best_size = combination, len(entries)
+            return best
+
+    def _run(self):
+        while not self._stop.is_set():
+            if not self.is_idle():
+                self._stop.wait(self.poll_interval)
+                continue
+            combination = self._next_combination()
+            if combination is None:
+                self._stop.wait(self.poll_interval)
+                continue
+            try:
+                with self.live_traffic.background():
+                    entry = self.produce(*combination)
+            except Exception as e:
+                logging.error(f"Opening pool failed to pre-generate for {combination}: {e}")
+                self._stop.wait(self.poll_interval * 10)
+                continue
+
+            entry["created_at"] = time.monotonic()
+            with self._lock:
+                if _digest(entry["argument_a"]) in self._served_set:
+                    self.stats["duplicates"] += 1
+                    continue
+                self._pool[combination].append(entry)
+                self.stats["produced"] += 1
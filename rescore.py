@@ -0,0 +1,211 @@
+"""Offline re-scoring of the discussion log with the current novelty metrics.
+
+Streams every session from the log store, pairs each iteration's connection
+with the previous iteration's connection, and scores the pairs in chunks
+across a process pool. Each worker loads the embedding model once and embeds
+a whole chunk in batched ``encode`` calls.
+
+Completed chunks are appended to a journal next to the log
+(``<log>.rescore-<name>.jsonl``) as soon as they finish, so an interrupted
+run resumes where it stopped. The journal's first line records the weights
+and metrics it was scored with; resuming with different ones is refused
+(use ``--restart`` or another ``--name``). When every pair is scored, the
+journal is merged into the log store in a single rewrite under
+``iteration["rescored"][name]``.
+
+    python rescore.py discussion_logs.json --name weights_v2 --weights 0.6,0.2,0.2 --workers 4
+"""
+import argparse
+import json
+import logging
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from difflib import SequenceMatcher
+from typing import Dict, Iterator, List, Set, Tuple
+
+from log_store import LogStore, open_log_store
+
+PairKey = Tuple[str, int]
+
+_detector = None
+_batch_size = 128
+
+# Everything _score_chunk writes for a pair; part of the journal header
+METRICS = ["semantic_novelty", "keyword_diversity", "topic_shift", "novelty_score", "sequence_similarity"]
+
+
+def iter_pairs(store: LogStore, done: Set[PairKey]) -> Iterator[Tuple[PairKey, str, str]]:
+    """Yields (key, new_text, previous_text) for every consecutive pair not yet scored."""
+    for session in store.iter_sessions():
+        previous = None
+        for iteration in session["iterations"]:
+            text = iteration.get("bot_a_connection")
+            if not text:
+                continue
+            key = (session["session_id"], iteration.get("iteration"))
+            if previous is not None and key not in done:
+                yield key, text, previous
+            previous = text
+
+
+def _init_worker(weights: Tuple[float, float, float], batch_size: int):
+    global _detector, _batch_size
+    from sentence_transformers import SentenceTransformer
+    from socratic_debate import NoveltyDetector
+
+    model = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
+    _detector = NoveltyDetector(model, weights)
+    _batch_size = batch_size
+
+
+def _score_chunk(chunk: List[Tuple[PairKey, str, str]]) -> List[Tuple[PairKey, Dict[str, float]]]:
+    # Consecutive pairs share texts, so each distinct text is embedded once
+    texts = list({text for _, new_text, prev_text in chunk for text in (new_text, prev_text)})
+    vectors = dict(zip(texts, _detector.embedding_model.encode(texts, batch_size=_batch_size)))
+
+    results = []
+    for key, new_text, prev_text in chunk:
+        metrics = _detector.metrics(new_text, prev_text, vectors[new_text], vectors[prev_text])
+        # Same scale as SocraticBot.similarity_check (0-100)
+        metrics["sequence_similarity"] = SequenceMatcher(None, new_text, prev_text).ratio() * 100
+        results.append((key, metrics))
+    return results
+
+
+def _chunks(pairs: Iterator, size: int) -> Iterator[List]:
+    chunk = []
+    for pair in pairs:
+        chunk.append(pair)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def journal_header(weights: Tuple[float, float, float]) -> Dict:
+    return {"record": "header", "weights": list(weights), "metrics": METRICS}
+
+
+def load_journal(path: str, header: Dict) -> Dict[PairKey, Dict[str, float]]:
+    """Reads the scored pairs of a journal written with the same header.
+
+    Raises ValueError if the journal was scored with other weights or metrics.
+    """
+    results = {}
+    try:
+        with open(path, "rb+") as f:
+            good_offset = 0
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # Torn final line from an interrupted run; drop it so new
+                    # records are not appended after garbage
+                    f.truncate(good_offset)
+                    break
+                if good_offset == 0:
+                    if record != header:
+                        raise ValueError(
+                            f"{path} was scored with weights {record.get('weights')} and metrics "
+                            f"{record.get('metrics')}, not {header['weights']} and {header['metrics']}; "
+                            f"rerun with --restart or use another --name"
+                        )
+                else:
+                    results[(record["session_id"], record["iteration"])] = record["metrics"]
+                good_offset += len(line)
+    except FileNotFoundError:
+        pass
+    return results
+
+
+def rescore(log_file: str, name: str, weights: Tuple[float, float, float], workers: int = os.cpu_count(),
+            chunk_size: int = 512, batch_size: int = 128, restart: bool = False) -> Dict:
+    store = open_log_store(log_file)
+    journal_path = f"{log_file}.rescore-{name}.jsonl"
+    header = journal_header(weights)
+    if restart and os.path.exists(journal_path):
+        os.remove(journal_path)
+    results = load_journal(journal_path, header)
+    if results:
+        print(f"Resuming: {len(results)} pairs already scored in {journal_path}")
+
+    scored = 0
+    start = time.perf_counter()
+    last_report = start
+    with open(journal_path, "a") as journal, ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(weights, batch_size)
+    ) as pool:
+        if journal.tell() == 0:
+            journal.write(json.dumps(header) + "\n")
+        chunks = _chunks(iter_pairs(store, set(results)), chunk_size)
+        pending = set()
+        # Keep a bounded number of chunks in flight so memory stays flat
+        for chunk in chunks:
+            pending.add(pool.submit(_score_chunk, chunk))
+            if len(pending) < workers * 2:
+                continue
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            scored += _write_results(journal, finished, results)
+            if time.perf_counter() - last_report > 10:
+                last_report = time.perf_counter()
+                print(f"{scored} pairs scored ({scored / (last_report - start):.1f} pairs/s)")
+        scored += _write_results(journal, pending, results)
+    elapsed = time.perf_counter() - start
+
+    updates = {key: {"rescored": {name: metrics}} for key, metrics in results.items()}
+    updated = store.update_iterations(updates) if updates else 0
+    stats = {
+        "name": name,
+        "weights": list(weights),
+        "pairs_scored": scored,
+        "pairs_total": len(results),
+        "iterations_updated": updated,
+        "seconds": elapsed,
+        "pairs_per_second": scored / elapsed if elapsed else 0.0,
+    }
+    logging.info(f"Rescoring finished: {stats}")
+    return stats
+
+
+def _write_results(journal, futures, results: Dict) -> int:
+    count = 0
+    for future in futures:
+        for (session_id, iteration), metrics in future.result():
+            journal.write(json.dumps({"session_id": session_id, "iteration": iteration, "metrics": metrics}) + "\n")
+            results[(session_id, iteration)] = metrics
+            count += 1
+    journal.flush()
+    os.fsync(journal.fileno())
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-score the discussion log with the current novelty metrics")
+    parser.add_argument("log_file", nargs="?", default="discussion_logs.json")
+    parser.add_argument("--name", required=True, help="Name under which results are stored in each iteration")
+    parser.add_argument("--weights", default="0.5,0.25,0.25",
+                        help="Semantic novelty, keyword diversity and topic shift weights")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--chunk-size", type=int, default=512, help="Pairs per worker task")
+    parser.add_argument("--batch-size", type=int, default=128, help="Embedding batch size")
+    parser.add_argument("--restart", action="store_true",
+                        help="Discard this name's journal instead of resuming from it")
+    args = parser.parse_args()
+
+    weights = tuple(float(w) for w in args.weights.split(","))
+    if len(weights) != 3:
+        parser.error("--weights takes exactly three comma-separated values")
+
+    try:
+        stats = rescore(args.log_file, args.name, weights, args.workers, args.chunk_size, args.batch_size,
+                        restart=args.restart)
+    except ValueError as e:
+        parser.exit(1, f"{e}\n")
+    print(f"\nScored {stats['pairs_scored']} pairs in {stats['seconds']:.1f}s "
+          f"({stats['pairs_per_second']:.1f} pairs/s); {stats['iterations_updated']} iterations updated.")
+
+
+if __name__ == "__main__":
+    main()
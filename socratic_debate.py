@@ -1,16 +1,19 @@
 import aiohttp
 import asyncio
 from bs4 import BeautifulSoup
-import ollama
-import json
 from datetime import datetime
 import random
 from typing import List, Dict, Tuple
 import logging
+import os
 import textwrap
+import time
+import uuid
 from difflib import SequenceMatcher
-from collections import Counter
+from collections import Counter, deque
 import numpy as np
+from hedging import HedgedChat
+from log_store import decode_vector, encode_vector, open_log_store
 try:
     from sentence_transformers import SentenceTransformer
 except ImportError:
@@ -25,6 +28,8 @@ except ImportError:
     """)
     raise
 
+OLLAMA_HOST = os.environ.get("OLLAMA_HOST", "http://207.211.161.65:8080")
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -50,10 +55,52 @@ class WikiTopicGenerator:
                     topics.append("Backup Topic")
         return topics
 
+# Weights for semantic novelty, keyword diversity and topic shift
+DEFAULT_NOVELTY_WEIGHTS = (0.5, 0.25, 0.25)
+
+class NoveltyStats:
+    """Constant-memory novelty statistics: a ring buffer of recent scores plus
+    a running mean and fast/slow exponential moving averages for the trend."""
+
+    __slots__ = ("recent", "count", "mean", "ewma_fast", "ewma_slow")
+
+    def __init__(self, window: int = 100):
+        self.recent = deque(maxlen=window)
+        self.count = 0
+        self.mean = 0.0
+        self.ewma_fast = None
+        self.ewma_slow = None
+
+    def append(self, score: float):
+        score = float(score)
+        self.recent.append(score)
+        self.count += 1
+        self.mean += (score - self.mean) / self.count
+        if self.ewma_fast is None:
+            self.ewma_fast = self.ewma_slow = score
+        else:
+            self.ewma_fast += 0.3 * (score - self.ewma_fast)
+            self.ewma_slow += 0.05 * (score - self.ewma_slow)
+
+    def recent_mean(self, n: int) -> float:
+        n = min(n, len(self.recent))
+        return sum(self.recent[-i] for i in range(1, n + 1)) / n if n else 0.0
+
+    @property
+    def trend(self) -> float:
+        """Positive when recent novelty is above its long-run level, negative when declining."""
+        if self.ewma_fast is None:
+            return 0.0
+        return self.ewma_fast - self.ewma_slow
+
+    def __len__(self) -> int:
+        return self.count
+
 class NoveltyDetector:
-    def __init__(self, embedding_model):
+    def __init__(self, embedding_model, weights: Tuple[float, float, float] = DEFAULT_NOVELTY_WEIGHTS):
         self.embedding_model = embedding_model
-        self.novelty_log = []
+        self.weights = weights
+        self.novelty_log = NoveltyStats()
     
     def keyword_diversity(self, new_text: str, previous_text: str) -> float:
         """Measures how different the word usage is between two texts."""
@@ -79,28 +126,64 @@ class NoveltyDetector:
     def cosine_similarity(self, a: np.ndarray, b: np.ndarray) -> float:
         return np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b))
 
+    def metrics(self, new_text: str, previous_text: str, new_vec: np.ndarray, prev_vec: np.ndarray) -> Dict[str, float]:
+        """Computes every novelty component for a pair with precomputed embeddings."""
+        sem_novelty = float(1 - self.cosine_similarity(new_vec, prev_vec))
+        key_div = self.keyword_diversity(new_text, previous_text)
+        topic_shift = self.topic_shift_penalty(new_text, previous_text)
+        w_sem, w_key, w_topic = self.weights
+        return {
+            "semantic_novelty": sem_novelty,
+            "keyword_diversity": key_div,
+            "topic_shift": topic_shift,
+            "novelty_score": (sem_novelty * w_sem) + (key_div * w_key) + (topic_shift * w_topic),  # Weighted combination
+        }
+
     def novelty_score(self, new_text: str, previous_text: str) -> float:
         """Combines semantic novelty, keyword diversity, and topic shift score."""
         if not new_text or not previous_text:
             return 1.0  # Assume novel if no prior comparison exists
 
-        sem_novelty = 1 - self.cosine_similarity(self.get_embedding(new_text), self.get_embedding(previous_text))
-        key_div = self.keyword_diversity(new_text, previous_text)
-        topic_shift = self.topic_shift_penalty(new_text, previous_text)
-
-        score = (sem_novelty * 0.5) + (key_div * 0.25) + (topic_shift * 0.25)  # Weighted combination
+        score = self.metrics(
+            new_text, previous_text, self.get_embedding(new_text), self.get_embedding(previous_text)
+        )["novelty_score"]
         
-        self.novelty_log.append(score)
-        self._check_novelty_trend()
+        self.record(score)
         
         return score
 
+    def record(self, score: float):
+        """Adds a novelty score to the history used by the trend check."""
+        self.novelty_log.append(score)
+        return self._check_novelty_trend()
+
+    def batch_novelty_scores(self, new_texts: List[str], previous_texts: List[str]) -> List[float]:
+        """Scores many (new, previous) pairs, encoding each side in a single batch."""
+        new_vecs = self.embedding_model.encode(new_texts)
+        prev_vecs = self.embedding_model.encode(previous_texts)
+
+        scores = []
+        for new_text, previous_text, new_vec, prev_vec in zip(new_texts, previous_texts, new_vecs, prev_vecs):
+            if not new_text or not previous_text:
+                scores.append(1.0)
+                continue
+            scores.append(self.metrics(new_text, previous_text, new_vec, prev_vec)["novelty_score"])
+        return scores
+
     def _check_novelty_trend(self):
-        """Monitors novelty trends and suggests interventions."""
-        if len(self.novelty_log) > 5:  # Check last 5 iterations
-            avg_novelty = sum(self.novelty_log[-5:]) / 5
-            if avg_novelty < 0.15:
-                logging.warning("⚠️ Persistent novelty decline detected!")
+        """Monitors novelty trends and suggests interventions.
+
+        Intervenes when the last 5 scores are low, or when novelty has fallen
+        well below its long-run level even if it is not low yet.
+        """
+        stats = self.novelty_log
+        if len(stats) > 5:  # Check last 5 iterations
+            avg_novelty = stats.recent_mean(5)
+            if avg_novelty < 0.15 or stats.trend < -0.15:
+                logging.warning(
+                    f"⚠️ Persistent novelty decline detected! Last 5: {avg_novelty:.2f}, "
+                    f"trend: {stats.trend:+.2f}, mean over {stats.count} scores: {stats.mean:.2f}"
+                )
                 return self._get_intervention()
         return None
 
@@ -116,8 +199,8 @@ class NoveltyDetector:
         return random.choice(interventions)
 
 class SocraticBot:
-    def __init__(self, host: str = "http://207.211.161.65:8080"):
-        self.client = ollama.Client(host=host)
+    def __init__(self, host: str = OLLAMA_HOST):
+        self.llm = HedgedChat.from_env(host, "llama2")
         self.perspectives = ["Functional", "Structural", "Psychological", "Historical", "Symbolic"]
         # Load MiniLM model for embeddings
         self.embedding_model = SentenceTransformer("sentence-transformers/all-MiniLM-L6-v2")
@@ -151,21 +234,21 @@ class SocraticBot:
             return 0
         return SequenceMatcher(None, new_text, old_text).ratio() * 100
 
-    async def generate_response(self, prompt: str, role: str, previous_response: str = None) -> str:
-        """Generate bot response and check novelty."""
+    async def generate_response(self, prompt: str, role: str, previous_response: str = None,
+                                raise_errors: bool = False) -> str:
+        """Generate bot response and check novelty.
+
+        Errors are returned as an "Error: ..." string unless raise_errors is set.
+        """
         try:
             # Generate a response
-            response = self.client.chat(
-                model="llama2",
-                messages=[{
-                    "role": "system",
-                    "content": f"You are {role}. {self.get_role_instructions(role)}"
-                }, {
-                    "role": "user",
-                    "content": prompt
-                }]
-            )
-            response_text = response.message.content
+            response_text = self.llm.chat(messages=[{
+                "role": "system",
+                "content": f"You are {role}. {self.get_role_instructions(role)}"
+            }, {
+                "role": "user",
+                "content": prompt
+            }])
 
             # If there's a previous response, calculate novelty
             if previous_response:
@@ -180,22 +263,20 @@ class SocraticBot:
                     logging.info(f"Forcing new perspective: {new_perspective}")
                     logging.info(f"Intervention: {intervention}")
 
-                    response = self.client.chat(
-                        model="llama2",
-                        messages=[{
-                            "role": "system",
-                            "content": f"You are {role}. {self.get_role_instructions(role)}"
-                        }, {
-                            "role": "user",
-                            "content": prompt
-                        }]
-                    )
-                    response_text = response.message.content
+                    response_text = self.llm.chat(messages=[{
+                        "role": "system",
+                        "content": f"You are {role}. {self.get_role_instructions(role)}"
+                    }, {
+                        "role": "user",
+                        "content": prompt
+                    }])
                     logging.info(f"Generated new response after perspective shift.")
 
             return response_text
         except Exception as e:
             logging.error(f"Error generating response: {e}")
+            if raise_errors:
+                raise
             return f"Error: {str(e)}"
 
     def get_role_instructions(self, role: str) -> str:
@@ -224,16 +305,32 @@ class SocraticBot:
         }
         return instructions.get(role, "No specific instructions available.")
 
+class IterationRecord:
+    """Compact per-iteration metadata kept after the full text has been flushed."""
+
+    __slots__ = ("session_id", "iteration", "novelty_score", "perspective_shift", "duration_seconds")
+
+    def __init__(self, session_id: str, iteration_log: Dict):
+        self.session_id = session_id
+        self.iteration = iteration_log["iteration"]
+        self.novelty_score = iteration_log.get("novelty_score")
+        self.perspective_shift = iteration_log.get("perspective_shift")
+        self.duration_seconds = iteration_log.get("duration_seconds")
+
 class DiscussionManager:
-    def __init__(self):
+    def __init__(self, host: str = OLLAMA_HOST, log_file: str = "discussion_logs.json",
+                 retain_iterations: bool = True, recent_iterations: int = 1000):
+        """Set retain_iterations=False for long-running use: completed iterations
+        are then written to the log store and dropped from memory, leaving only
+        the last `recent_iterations` IterationRecords (see iteration_stats)."""
         self.topic_generator = WikiTopicGenerator()
-        self.bot = SocraticBot()
-        self.log_file = "discussion_logs.json"
-        self.session_log = {
-            "session_id": datetime.now().strftime("%Y%m%d_%H%M%S"),
-            "topics": [],
-            "iterations": []
-        }
+        self.bot = SocraticBot(host)
+        self.log_store = open_log_store(log_file)
+        self.retain_iterations = retain_iterations
+        self.recent_iterations = deque(maxlen=recent_iterations)
+        # Keys of the in-progress iteration already in the log store
+        self._saved_progress = set()
+        self.session_log = self._new_session_log()
         self.wrapper = textwrap.TextWrapper(
             width=80,
             initial_indent="    ",
@@ -310,129 +407,238 @@ class DiscussionManager:
         
         return topics
 
-    async def run_discussion(self, max_iterations: int = 3):
-        self.session_log["topics"] = await self.get_topics_from_input()
+    def _new_session_log(self) -> Dict:
+        session_log = {
+            # Random suffix keeps ids unique for sessions started in the same second
+            "session_id": f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}",
+            "topics": [],
+            "completed_iterations": 0
+        }
+        if self.retain_iterations:
+            session_log["iterations"] = []
+        return session_log
+
+    async def run_discussion(self, max_iterations: int = 3, topics: List[str] = None):
+        self.session_log = self._new_session_log()
+        self.session_log["topics"] = topics or await self.get_topics_from_input()
+        self.session_log["max_iterations"] = max_iterations
+        self.session_log["status"] = "running"
+        self.save_log()
         print("\n" + "="*80)
         print(f"Starting discussion with topics: {self.session_log['topics'][0]} and {self.session_log['topics'][1]}")
         print("="*80 + "\n")
+        await self._run_iterations()
+
+    async def resume(self, session_id: str):
+        """Reloads a checkpointed session and continues from the step that failed."""
+        session_log = self.log_store.get_session(session_id)
+        if session_log is None:
+            raise ValueError(f"No discussion found with session_id {session_id}")
+        if session_log.get("status") == "completed":
+            print(f"\nDiscussion {session_id} already completed.")
+            return
+
+        self.session_log = session_log
+        self.session_log["completed_iterations"] = len(session_log["iterations"])
+        if not self.retain_iterations:
+            del self.session_log["iterations"]
+        self.session_log.setdefault("max_iterations", 3)
+        self.session_log["status"] = "running"
+        in_progress = self.session_log.get("in_progress") or {}
+        print("\n" + "="*80)
+        print(f"Resuming discussion {session_id} with topics: {self.session_log['topics'][0]} and {self.session_log['topics'][1]}")
+        print(f"Completed iterations: {self.session_log['completed_iterations']}, "
+              f"checkpointed steps in current iteration: {len(in_progress)}")
+        print("="*80 + "\n")
+        await self._run_iterations()
+
+    async def _checkpointed(self, iteration_log: Dict, key: str, generate):
+        """Returns iteration_log[key] if already checkpointed, else generates and checkpoints it."""
+        if key in iteration_log:
+            return iteration_log[key]
+        iteration_log[key] = await generate()
+        self.save_progress(iteration_log)
+        return iteration_log[key]
+
+    def _checkpointed_embedding(self, iteration_log: Dict, key: str, text: str) -> np.ndarray:
+        if key not in iteration_log:
+            iteration_log[key] = encode_vector(self.bot.novelty_detector.get_embedding(text))
+        return decode_vector(iteration_log[key])
+
+    async def _run_iterations(self):
+        topics = self.session_log["topics"]
+        max_iterations = self.session_log["max_iterations"]
 
         # Keep track of the best argument and its embedding
-        current_best_argument = None
-        current_best_embedding = None
+        state = self.session_log.setdefault("state", {
+            "current_best_argument": None,
+            "current_best_embedding": None
+        })
+        current_best_argument = state["current_best_argument"]
+        current_best_embedding = decode_vector(state["current_best_embedding"])
 
-        for i in range(max_iterations):
+        def generate(prompt, role):
+            return lambda: self.bot.generate_response(prompt, role, raise_errors=True)
+
+        for i in range(self.session_log["completed_iterations"], max_iterations):
             print(f"\nIteration {i + 1}:")
             print("-"*40)
-            iteration_log = {"iteration": i + 1}
-            
-            # Bot A: Generate or refine connection
-            print("\nBot A (Connector) is thinking...")
-            if current_best_argument is None:
-                prompt = f"Find a meaningful connection between these topics: {self.session_log['topics'][0]} and {self.session_log['topics'][1]}"
-            else:
-                prompt = f"Building upon this previous argument: '{current_best_argument}'\nRefine and improve this connection between {self.session_log['topics'][0]} and {self.session_log['topics'][1]}. Focus on making the connection more specific and stronger."
-            
-            connection = await self.bot.generate_response(prompt, "connector", current_best_argument)
-            connection_embedding = self.bot.novelty_detector.get_embedding(connection)
-            print(f"\nBot A: {self.format_response(connection)}\n")
-            iteration_log["bot_a_connection"] = connection
-            
-            # Novelty Check: Compare against previous best
-            if current_best_embedding is not None:
-                novelty_score = 1 - self.bot.novelty_detector.cosine_similarity(connection_embedding, current_best_embedding)
-                logging.info(f"Novelty Score for Iteration {i + 1}: {novelty_score:.2f}")
-                iteration_log["novelty_score"] = novelty_score
-
-                if novelty_score < 0.3:
-                    print("\n🚨 Low novelty detected! Forcing a perspective shift...")
-                    intervention = self.bot.novelty_detector._get_intervention()
-                    new_perspective = self.bot.force_new_perspective()
-                    prompt = f"Using a {new_perspective} perspective and following this instruction: {intervention}\n{prompt}"
-                    print(f"\nIntervention: {intervention}")
-                    connection = await self.bot.generate_response(prompt, "connector")
-                    print(f"\nBot A (New Perspective): {self.format_response(connection)}\n")
-                    connection_embedding = self.bot.novelty_detector.get_embedding(connection)
-                    iteration_log["perspective_shift"] = new_perspective
-                    iteration_log["intervention"] = intervention
-            
-            # Bot B: Evaluate
-            print("\nBot B (Evaluator) is analyzing...")
-            critique = await self.bot.generate_response(
-                f"Evaluate this connection, comparing it to the previous best argument if it exists:\nPrevious best: {current_best_argument if current_best_argument else 'None'}\nNew argument: {connection}",
-                "evaluator"
-            )
-            print(f"\nBot B: {self.format_response(critique)}\n")
-            iteration_log["bot_b_critique"] = critique
-            
-            # Bot A: Refine based on critique
-            print("\nBot A is refining the argument...")
-            refined = await self.bot.generate_response(
-                f"Using the previous best argument as a foundation: '{current_best_argument if current_best_argument else 'None'}'\n" +
-                f"And considering this critique: {critique}\n" +
-                "Refine your connection. Focus on building upon strengths while addressing the specific weaknesses identified.",
-                "connector"
-            )
-            print(f"\nBot A (Refined): {self.format_response(refined)}\n")
-            iteration_log["bot_a_refined"] = refined
-            
-            # Bot C: Decide and update best argument
-            print("\nBot C (Decider) is evaluating...")
-            decision_prompt = f"""Compare these arguments and decide which is strongest:
+            # A partially completed iteration is restored from its checkpoint
+            restored = self.session_log.get("in_progress")
+            iteration_log = restored or {"iteration": i + 1}
+            self.session_log["in_progress"] = iteration_log
+            self._saved_progress = set(restored or ())
+            iteration_start = time.perf_counter()
+
+            try:
+                # Bot A: Generate or refine connection
+                print("\nBot A (Connector) is thinking...")
+                if current_best_argument is None:
+                    prompt = f"Find a meaningful connection between these topics: {topics[0]} and {topics[1]}"
+                else:
+                    prompt = f"Building upon this previous argument: '{current_best_argument}'\nRefine and improve this connection between {topics[0]} and {topics[1]}. Focus on making the connection more specific and stronger."
+
+                # No previous_response: the perspective shift below is its own
+                # checkpointed step, so one step never makes two LLM calls
+                connection = await self._checkpointed(
+                    iteration_log, "bot_a_connection", generate(prompt, "connector")
+                )
+                connection_embedding = self._checkpointed_embedding(iteration_log, "connection_embedding", connection)
+                print(f"\nBot A: {self.format_response(connection)}\n")
+
+                # Novelty Check: Compare against previous best
+                if current_best_embedding is not None:
+                    novelty_score = float(1 - self.bot.novelty_detector.cosine_similarity(connection_embedding, current_best_embedding))
+                    logging.info(f"Novelty Score for Iteration {i + 1}: {novelty_score:.2f}")
+                    iteration_log["novelty_score"] = novelty_score
+                    self.bot.novelty_detector.record(self.bot.novelty_detector.metrics(
+                        connection, current_best_argument, connection_embedding, current_best_embedding
+                    )["novelty_score"])
+
+                    if novelty_score < 0.3:
+                        print("\n🚨 Low novelty detected! Forcing a perspective shift...")
+                        if "intervention" not in iteration_log:
+                            iteration_log["intervention"] = self.bot.novelty_detector._get_intervention()
+                            iteration_log["perspective_shift"] = self.bot.force_new_perspective()
+                        intervention = iteration_log["intervention"]
+                        new_perspective = iteration_log["perspective_shift"]
+                        prompt = f"Using a {new_perspective} perspective and following this instruction: {intervention}\n{prompt}"
+                        print(f"\nIntervention: {intervention}")
+                        connection = await self._checkpointed(
+                            iteration_log, "bot_a_shifted_connection", generate(prompt, "connector")
+                        )
+                        print(f"\nBot A (New Perspective): {self.format_response(connection)}\n")
+                        connection_embedding = self._checkpointed_embedding(
+                            iteration_log, "shifted_connection_embedding", connection
+                        )
+
+                # Bot B: Evaluate
+                print("\nBot B (Evaluator) is analyzing...")
+                critique = await self._checkpointed(iteration_log, "bot_b_critique", generate(
+                    f"Evaluate this connection, comparing it to the previous best argument if it exists:\nPrevious best: {current_best_argument if current_best_argument else 'None'}\nNew argument: {connection}",
+                    "evaluator"
+                ))
+                print(f"\nBot B: {self.format_response(critique)}\n")
+
+                # Bot A: Refine based on critique
+                print("\nBot A is refining the argument...")
+                refined = await self._checkpointed(iteration_log, "bot_a_refined", generate(
+                    f"Using the previous best argument as a foundation: '{current_best_argument if current_best_argument else 'None'}'\n" +
+                    f"And considering this critique: {critique}\n" +
+                    "Refine your connection. Focus on building upon strengths while addressing the specific weaknesses identified.",
+                    "connector"
+                ))
+                print(f"\nBot A (Refined): {self.format_response(refined)}\n")
+
+                # Bot C: Decide and update best argument
+                print("\nBot C (Decider) is evaluating...")
+                decision_prompt = f"""Compare these arguments and decide which is strongest:
 1. Previous best argument: {current_best_argument if current_best_argument else 'None'}
 2. New connection: {connection}
 3. Refined version: {refined}
 
 Choose the strongest version and explain why. If the improvement is negligible, state this explicitly."""
 
-            decision = await self.bot.generate_response(decision_prompt, "decider")
-            print(f"\nBot C: {self.format_response(decision)}\n")
-            iteration_log["bot_c_decision"] = decision
-            
+                decision = await self._checkpointed(iteration_log, "bot_c_decision", generate(decision_prompt, "decider"))
+                print(f"\nBot C: {self.format_response(decision)}\n")
+            except Exception as e:
+                logging.error(
+                    f"Discussion {self.session_log['session_id']} interrupted in iteration {i + 1}: {e}. "
+                    f"Resume with: python socratic_debate.py --resume {self.session_log['session_id']}"
+                )
+                raise
+
             # Update the current best argument based on Bot C's decision
             if "refined version" in decision.lower() or "refined argument" in decision.lower():
                 current_best_argument = refined
-                current_best_embedding = self.bot.novelty_detector.get_embedding(refined)
+                current_best_embedding = self._checkpointed_embedding(iteration_log, "refined_embedding", refined)
             elif "new connection" in decision.lower():
                 current_best_argument = connection
                 current_best_embedding = connection_embedding
-            
-            self.session_log["iterations"].append(iteration_log)
-            self.save_log()
-            
+
+            iteration_log["duration_seconds"] = time.perf_counter() - iteration_start
+            state["current_best_argument"] = current_best_argument
+            state["current_best_embedding"] = (
+                encode_vector(current_best_embedding) if current_best_embedding is not None else None
+            )
+            if self.retain_iterations:
+                self.session_log["iterations"].append(iteration_log)
+            self.session_log["completed_iterations"] += 1
+            self.session_log["in_progress"] = None
+            self.recent_iterations.append(IterationRecord(self.session_log["session_id"], iteration_log))
+            new_fields = {k: v for k, v in iteration_log.items() if k not in self._saved_progress}
+            try:
+                self.log_store.append_iteration(self._session_header(), iteration_log, new_fields)
+            except Exception as e:
+                logging.error(f"Error saving log: {e}")
+
             print("\n" + "="*80)
             print(f"Completed iteration {i + 1}")
             print(f"Current best argument: {self.format_response(current_best_argument)}")
             print("="*80 + "\n")
 
+        self.session_log["status"] = "completed"
+        self.save_log()
+
+    def _session_header(self) -> Dict:
+        """The session without its iterations, which are saved by append_iteration."""
+        return {k: v for k, v in self.session_log.items() if k != "iterations"}
+
     def save_log(self):
         try:
-            # Try to load existing logs
-            try:
-                with open(self.log_file, 'r') as f:
-                    all_logs = json.load(f)
-            except (FileNotFoundError, json.JSONDecodeError):
-                all_logs = {"discussions": []}
-            
-            # Check if this session already exists
-            session_exists = False
-            for log in all_logs["discussions"]:
-                if log["session_id"] == self.session_log["session_id"]:
-                    log.update(self.session_log)
-                    session_exists = True
-                    break
-            
-            # If session doesn't exist, append it
-            if not session_exists:
-                all_logs["discussions"].append(self.session_log)
-            
-            # Save all logs
-            with open(self.log_file, 'w') as f:
-                json.dump(all_logs, f, indent=2)
-                
+            self.log_store.save_session(self._session_header())
+        except Exception as e:
+            logging.error(f"Error saving log: {e}")
+
+    def save_progress(self, iteration_log: Dict):
+        """Saves the fields of the in-progress iteration that are not in the log yet."""
+        fields = {k: v for k, v in iteration_log.items() if k not in self._saved_progress}
+        try:
+            self.log_store.save_progress(self._session_header(), fields)
         except Exception as e:
             logging.error(f"Error saving log: {e}")
+            return
+        self._saved_progress.update(fields)
+
+    def iteration_stats(self) -> Dict:
+        """Summary of the last `recent_iterations` completed iterations."""
+        records = list(self.recent_iterations)
+        durations = [r.duration_seconds for r in records if r.duration_seconds is not None]
+        novelty = [r.novelty_score for r in records if r.novelty_score is not None]
+        return {
+            "iterations": len(records),
+            "sessions": len({r.session_id for r in records}),
+            "mean_duration_seconds": sum(durations) / len(durations) if durations else None,
+            "mean_novelty": sum(novelty) / len(novelty) if novelty else None,
+            "perspective_shifts": sum(r.perspective_shift is not None for r in records),
+        }
+
+async def main(resume_session_id: str = None):
+    if resume_session_id:
+        manager = DiscussionManager()
+        await manager.resume(resume_session_id)
+        return
 
-async def main():
     print("""
 🤖 Welcome to the Socratic Debate System! 🤖
 
@@ -458,8 +664,12 @@ The discussion can use:
     print("\nThank you for using the Socratic Debate System! 👋")
 
 if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Socratic Debate System")
+    parser.add_argument("--resume", metavar="SESSION_ID", help="Resume an interrupted discussion from its last checkpoint")
+    args = parser.parse_args()
     try:
-        asyncio.run(main())
+        asyncio.run(main(args.resume))
     except KeyboardInterrupt:
         print("\n\nDiscussion terminated by user. Goodbye! 👋")
     except Exception as e:
@@ -0,0 +1,68 @@
+"""Hedging checks against two Ollama stubs: a slow primary and a fast hedge.
+
+    python -m pytest test_hedging.py
+"""
+import asyncio
+import time
+
+import pytest
+
+from hedging import AsyncHedgedChat, Backend, HedgedChat, LatencyTracker
+from ollama_stub import OllamaStubServer, StubConfig
+
+HEDGE_DELAY = 0.2
+MESSAGES = [{"role": "user", "content": "Connect jazz and tides."}]
+
+
+@pytest.fixture
+def stubs():
+    # The primary streams for several seconds, so closing it early is visible
+    slow = OllamaStubServer(config=StubConfig(latency="fixed:1.0", tokens_per_second=50, response_words=200))
+    fast = OllamaStubServer(config=StubConfig(latency="fixed:0", tokens_per_second=1e6, response_words=20))
+    yield slow, fast
+    slow.stop()
+    fast.stop()
+
+
+def _client(cls, slow, fast):
+    client = cls([Backend(slow.start()), Backend(fast.start())], initial_delay=HEDGE_DELAY)
+    client.latency = LatencyTracker(min_samples=1)
+    return client
+
+
+def _wait_for_disconnect(stub, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while stub.stats()["disconnects"] == 0 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    return stub.stats()
+
+
+def _check(client, slow, fast):
+    assert client.stats()["hedged"] == 1
+    assert client.stats()["hedge_wins"] == 1
+    assert client.stats()["cancelled"] == 1
+    assert fast.stats()["requests"] == 1
+    # The losing primary's stream was closed, not read to the end
+    slow_stats = _wait_for_disconnect(slow)
+    assert slow_stats["requests"] == 1
+    assert slow_stats["disconnects"] == 1
+    # The lost primary is sampled from its own start, not the hedge's
+    assert client.latency.percentile(50) >= HEDGE_DELAY
+
+
+def test_hedge_wins_and_closes_the_primary(stubs):
+    slow, fast = stubs
+    client = _client(HedgedChat, slow, fast)
+
+    assert client.chat(messages=MESSAGES)
+
+    _check(client, slow, fast)
+
+
+def test_async_hedge_wins_and_closes_the_primary(stubs):
+    slow, fast = stubs
+    client = _client(AsyncHedgedChat, slow, fast)
+
+    assert asyncio.run(client.chat(messages=MESSAGES))
+
+    _check(client, slow, fast)
@@ -0,0 +1,111 @@
+"""Round-trip checks for the discussion log stores.
+
+    python -m pytest test_log_store.py
+"""
+import glob
+import json
+
+import pytest
+
+from log_store import JsonlLogStore, LogStore, open_log_store
+
+
+def _session(session_id, iterations=2):
+    return {
+        "session_id": session_id,
+        "status": "completed",
+        "iterations": [{"iteration": i, "bot_a_connection": f"{session_id} idea {i}"} for i in range(iterations)],
+    }
+
+
+@pytest.mark.parametrize("suffix", [".json", ".jsonl"])
+def test_update_iterations_then_iter_sessions(tmp_path, suffix):
+    store = open_log_store(str(tmp_path / f"log{suffix}"))
+    store.save_session(_session("a"))
+    store.save_session(_session("b"))
+
+    updated = store.update_iterations({("a", 1): {"rescored": {"v2": {"novelty_score": 0.5}}}})
+    updated += store.update_iterations({("a", 1): {"rescored": {"v3": {"novelty_score": 0.7}}}})
+
+    assert updated == 2
+    sessions = {session["session_id"]: session for session in store.iter_sessions()}
+    assert sorted(sessions) == ["a", "b"]
+    assert sessions["a"]["iterations"][1]["rescored"] == {
+        "v2": {"novelty_score": 0.5},
+        "v3": {"novelty_score": 0.7},
+    }
+    assert "rescored" not in sessions["a"]["iterations"][0]
+    assert store.get_session("a") == sessions["a"]
+
+
+def test_append_after_torn_record(tmp_path):
+    store = JsonlLogStore(str(tmp_path / "log.jsonl"))
+    store.save_session(_session("a", iterations=1))
+    with open(store.log_file, "a") as f:
+        f.write('{"record": "iteration", "session_id": "a", "itera')
+
+    store.append_iteration(_session("a", iterations=0), {"iteration": 1, "bot_a_connection": "after crash"})
+
+    assert [it["iteration"] for it in store.get_session("a")["iterations"]] == [0, 1]
+
+
+def test_append_after_unterminated_record(tmp_path):
+    store = JsonlLogStore(str(tmp_path / "log.jsonl"))
+    with open(store.log_file, "w") as f:
+        f.write('{"record": "iteration", "session_id": "a", "iteration": 0}')
+
+    store.append_iteration(_session("a", iterations=0), {"iteration": 1})
+
+    assert [it["iteration"] for it in store.get_session("a")["iterations"]] == [0, 1]
+
+
+def test_truncated_json_log_keeps_complete_sessions(tmp_path):
+    store = LogStore(str(tmp_path / "log.json"))
+    text = json.dumps({"discussions": [_session("a"), _session("b"), _session("c")]}, indent=2)
+    with open(store.log_file, "w") as f:
+        f.write(text[:text.index('"c idea 1"')])
+
+    assert [session["session_id"] for session in store.iter_sessions()] == ["a", "b"]
+
+    store.save_session(_session("d"))
+
+    assert [session["session_id"] for session in store.iter_sessions()] == ["a", "b", "d"]
+    assert len(glob.glob(store.log_file + ".corrupt-*")) == 1
+
+
+@pytest.mark.parametrize("suffix", [".json", ".jsonl"])
+def test_progress_then_completed_iteration(tmp_path, suffix):
+    store = open_log_store(str(tmp_path / f"log{suffix}"))
+    header = {"session_id": "a", "status": "running"}
+    store.save_session(header)
+
+    progress = {"iteration": 1, "bot_a_connection": "first"}
+    store.save_progress(dict(header, in_progress=progress), dict(progress))
+    progress["bot_b_critique"] = "second"
+    store.save_progress(dict(header, in_progress=progress), {"bot_b_critique": "second"})
+
+    assert store.get_session("a")["in_progress"] == progress
+
+    progress["duration_seconds"] = 1.5
+    store.append_iteration(dict(header, in_progress=None), progress, {"duration_seconds": 1.5})
+
+    session = store.get_session("a")
+    assert session["in_progress"] is None
+    assert session["iterations"] == [progress]
+
+
+def test_archive_is_built_from_a_log_and_read_only(tmp_path):
+    transcript_archive = pytest.importorskip("transcript_archive")
+    source = JsonlLogStore(str(tmp_path / "log.jsonl"))
+    for session_id in ("a", "b"):
+        source.save_session(_session(session_id))
+    source.update_iterations({("b", 0): {"rescored": {"v2": {"novelty_score": 0.5}}}})
+    archive_path = str(tmp_path / "log.archive")
+
+    transcript_archive.build(source.log_file, archive_path)
+
+    archive = open_log_store(archive_path, read_only=True)
+    assert list(archive.iter_sessions()) == list(source.iter_sessions())
+    assert archive.get_session("b")["iterations"][0]["rescored"] == {"v2": {"novelty_score": 0.5}}
+    with pytest.raises(ValueError, match="read-only"):
+        open_log_store(archive_path)
@@ -0,0 +1,80 @@
+"""Checkpoint/resume checks for DiscussionManager against the Ollama stub.
+
+    python -m pytest test_socratic_debate.py
+"""
+import asyncio
+
+import pytest
+
+pytest.importorskip("sentence_transformers")
+
+from hedging import Backend, HedgedChat
+from ollama_stub import OllamaStubServer, StubConfig
+from socratic_debate import DiscussionManager, NoveltyDetector
+
+# The LLM text each checkpointed step stores; one call per key
+LLM_STEPS = ("bot_a_connection", "bot_a_shifted_connection", "bot_b_critique", "bot_a_refined", "bot_c_decision")
+
+
+class CountingChat:
+    """Wraps a chat client, counting calls and failing the ``fail_at``-th one."""
+
+    def __init__(self, llm, fail_at: int = None):
+        self.llm = llm
+        self.fail_at = fail_at
+        self.calls = 0
+
+    def chat(self, **kwargs):
+        self.calls += 1
+        if self.calls == self.fail_at:
+            raise ConnectionError("stub backend went away")
+        return self.llm.chat(**kwargs)
+
+
+@pytest.fixture(scope="module")
+def stub_url():
+    # Long replies from the stub's small vocabulary overlap heavily, so the
+    # low-novelty perspective shift is exercised too
+    stub = OllamaStubServer(config=StubConfig(tokens_per_second=1e6, latency="fixed:0", response_words=400))
+    yield stub.start()
+    stub.stop()
+
+
+def _manager(stub_url, log_file, fail_at=None):
+    manager = DiscussionManager(host=stub_url, log_file=log_file)
+    manager.bot.llm = CountingChat(HedgedChat([Backend(stub_url)]), fail_at)
+    return manager
+
+
+@pytest.mark.parametrize("suffix", [".json", ".jsonl"])
+@pytest.mark.parametrize("fail_at", [1, 3, 7])
+def test_resume_makes_only_the_remaining_calls(tmp_path, stub_url, suffix, fail_at):
+    log_file = str(tmp_path / f"log{suffix}")
+    manager = _manager(stub_url, log_file, fail_at)
+    with pytest.raises(ConnectionError):
+        asyncio.run(manager.run_discussion(max_iterations=3, topics=["Jazz", "Tides"]))
+    session_id = manager.session_log["session_id"]
+
+    # A new manager, as after a restart of the process
+    resumed = _manager(stub_url, log_file)
+    asyncio.run(resumed.resume(session_id))
+
+    session = resumed.log_store.get_session(session_id)
+    assert session["status"] == "completed"
+    assert [it["iteration"] for it in session["iterations"]] == [1, 2, 3]
+    steps = sum(key in iteration for iteration in session["iterations"] for key in LLM_STEPS)
+    # Every stored step was generated exactly once: nothing before the
+    # failure was lost and nothing was asked for twice
+    assert (fail_at - 1) + resumed.bot.llm.calls == steps
+
+
+def test_novelty_trend_intervenes_on_decline():
+    detector = NoveltyDetector(embedding_model=None)
+    assert all(detector.record(0.7) is None for _ in range(20))
+
+    # Still above the low-novelty floor, but falling fast
+    interventions = [detector.record(0.35) for _ in range(3)]
+
+    assert interventions[-1] is not None
+    assert detector.novelty_log.trend < 0
+    assert detector.novelty_log.mean == pytest.approx((20 * 0.7 + 3 * 0.35) / 23)
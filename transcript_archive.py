@@ -0,0 +1,254 @@
+"""Compressed, random-access archive of discussion sessions.
+
+Each session is stored as its own zstd frame, compressed with a dictionary
+trained on the transcripts themselves, so the repetitive prose compresses
+well even though every session is compressed separately. An index at the end
+of the file maps session ids to block offsets:
+
+    b"DLOGARC1"        magic
+    dictionary         zstd dictionary (empty if there was too little to train on)
+    block ...          one zstd frame per session, compact JSON
+    index              zstd frame, JSON {"format_version", "dictionary", "sessions"}
+    footer             index offset (u64 LE), index length (u64 LE), b"DLOGARC1"
+
+Reading one session costs one seek and one decompression; iter_sessions()
+streams the blocks in file order, holding one session in memory at a time.
+Archives are read-only: discussions log to ``.jsonl`` and are compacted into
+an archive (with a freshly trained dictionary) by ``build``:
+
+    python transcript_archive.py build discussion_logs.jsonl discussions.archive
+    python transcript_archive.py info discussions.archive
+    python transcript_archive.py show discussions.archive 20250228_112752_1a2b3c4d
+"""
+import argparse
+import json
+import logging
+import os
+import struct
+import tempfile
+from typing import Dict, Iterator, List, Optional
+
+import zstandard as zstd
+
+from log_store import _file_mode, _to_json, open_log_store
+
+MAGIC = b"DLOGARC1"
+FOOTER = struct.Struct("<QQ8s")
+FORMAT_VERSION = 1
+DEFAULT_DICT_SIZE = 112640  # zstd's own default, 110 KiB
+DEFAULT_LEVEL = 10
+
+
+def _encode(session: Dict) -> bytes:
+    return json.dumps(session, separators=(",", ":"), default=_to_json).encode("utf-8")
+
+
+def train_dictionary(sessions: List[Dict], dict_size: int = DEFAULT_DICT_SIZE) -> bytes:
+    """Trains a zstd dictionary on the sessions, one sample per iteration and header.
+
+    Returns b"" when there is too little data to train on, or when storing the
+    dictionary would cost more than it saves on these sessions.
+    """
+    samples = []
+    for session in sessions:
+        samples.append(_encode({k: v for k, v in session.items() if k != "iterations"}))
+        samples.extend(_encode(iteration) for iteration in session.get("iterations", []))
+    # Keep the dictionary small next to the data it was trained on, or storing
+    # it costs more than it saves
+    dict_size = min(dict_size, sum(len(s) for s in samples) // 20)
+    if dict_size < 1024 or len(samples) < 8:
+        return b""
+    try:
+        dictionary = zstd.train_dictionary(dict_size, samples)
+    except zstd.ZstdError as e:
+        logging.warning(f"Could not train a compression dictionary, compressing without one: {e}")
+        return b""
+
+    blocks = [_encode(session) for session in sessions]
+    plain = zstd.ZstdCompressor(level=DEFAULT_LEVEL)
+    trained = zstd.ZstdCompressor(level=DEFAULT_LEVEL, dict_data=dictionary)
+    with_dictionary = len(dictionary.as_bytes()) + sum(len(trained.compress(b)) for b in blocks)
+    if with_dictionary >= sum(len(plain.compress(b)) for b in blocks):
+        return b""
+    return dictionary.as_bytes()
+
+
+class ArchiveLogStore:
+    """Read-only log store backed by a transcript archive (the reading half of LogStore)."""
+
+    def __init__(self, log_file: str = "discussion_logs.archive"):
+        self.log_file = log_file
+
+    def _read_index(self, f) -> Dict:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        f.seek(0)
+        if f.read(len(MAGIC)) != MAGIC or size < len(MAGIC) + FOOTER.size:
+            raise ValueError(f"{self.log_file} is not a transcript archive")
+        f.seek(size - FOOTER.size)
+        index_offset, index_length, magic = FOOTER.unpack(f.read(FOOTER.size))
+        if magic != MAGIC or index_offset + index_length != size - FOOTER.size:
+            raise ValueError(f"Transcript archive {self.log_file} has no valid index")
+        f.seek(index_offset)
+        index = json.loads(zstd.ZstdDecompressor().decompress(f.read(index_length)))
+        if index["format_version"] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported archive format version {index['format_version']}")
+        return index
+
+    @staticmethod
+    def _dictionary(f, index: Dict) -> Optional[zstd.ZstdCompressionDict]:
+        offset, length = index["dictionary"]
+        if not length:
+            return None
+        f.seek(offset)
+        return zstd.ZstdCompressionDict(f.read(length))
+
+    def _decompressor(self, f, index: Dict) -> zstd.ZstdDecompressor:
+        dictionary = self._dictionary(f, index)
+        return zstd.ZstdDecompressor(dict_data=dictionary) if dictionary else zstd.ZstdDecompressor()
+
+    def index(self) -> Dict:
+        """The archive index: dictionary location and [session_id, offset, length, iterations] per session."""
+        try:
+            with open(self.log_file, 'rb') as f:
+                return self._read_index(f)
+        except FileNotFoundError:
+            return {"format_version": FORMAT_VERSION, "dictionary": [0, 0], "sessions": []}
+
+    def iter_sessions(self) -> Iterator[Dict]:
+        try:
+            f = open(self.log_file, 'rb')
+        except FileNotFoundError:
+            return
+        with f:
+            index = self._read_index(f)
+            dctx = self._decompressor(f, index)
+            for _, offset, length, _ in sorted(index["sessions"], key=lambda entry: entry[1]):
+                f.seek(offset)
+                yield json.loads(dctx.decompress(f.read(length)))
+
+    def get_session(self, session_id: str) -> Optional[Dict]:
+        try:
+            f = open(self.log_file, 'rb')
+        except FileNotFoundError:
+            return None
+        with f:
+            index = self._read_index(f)
+            for entry_id, offset, length, _ in index["sessions"]:
+                if entry_id == session_id:
+                    dctx = self._decompressor(f, index)
+                    f.seek(offset)
+                    return json.loads(dctx.decompress(f.read(length)))
+        return None
+
+
+def _write_index(f, index: Dict):
+    index_offset = f.tell()
+    body = {k: index[k] for k in ("format_version", "dictionary", "sessions")}
+    f.write(zstd.ZstdCompressor(level=DEFAULT_LEVEL).compress(json.dumps(body).encode("utf-8")))
+    f.write(FOOTER.pack(index_offset, f.tell() - index_offset, MAGIC))
+
+
+def write_archive(path: str, sessions, dictionary: bytes = b"", level: int = DEFAULT_LEVEL) -> Dict:
+    """Writes the sessions (any iterable) to a new archive at ``path``, atomically."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        # mkstemp creates the file 0600; keep the archive readable as before
+        os.chmod(tmp_path, _file_mode(path))
+        with os.fdopen(fd, 'wb') as f:
+            f.write(MAGIC)
+            f.write(dictionary)
+            cctx = zstd.ZstdCompressor(level=level, dict_data=zstd.ZstdCompressionDict(dictionary)) \
+                if dictionary else zstd.ZstdCompressor(level=level)
+            entries = {}
+            for session in sessions:
+                offset = f.tell()
+                f.write(cctx.compress(_encode(session)))
+                entries[session["session_id"]] = [
+                    session["session_id"], offset, f.tell() - offset, len(session.get("iterations", []))
+                ]
+            index = {
+                "format_version": FORMAT_VERSION,
+                "dictionary": [len(MAGIC), len(dictionary)],
+                "sessions": list(entries.values()),
+            }
+            _write_index(f, index)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return index
+
+
+def build(source: str, dest: str, dict_size: int = DEFAULT_DICT_SIZE, level: int = DEFAULT_LEVEL,
+          max_training_sessions: int = 2000) -> Dict:
+    """Archives every session of the source log (any format, including an older archive).
+
+    The dictionary is trained on the first ``max_training_sessions`` sessions.
+    """
+    store = open_log_store(source, read_only=True)
+    training = []
+    for session in store.iter_sessions():
+        training.append(session)
+        if len(training) >= max_training_sessions:
+            break
+    dictionary = train_dictionary(training, dict_size) if dict_size else b""
+    del training
+    index = write_archive(dest, store.iter_sessions(), dictionary=dictionary, level=level)
+    return {
+        "sessions": len(index["sessions"]),
+        "iterations": sum(entry[3] for entry in index["sessions"]),
+        "dictionary_bytes": len(dictionary),
+        "source_bytes": os.path.getsize(source),
+        "archive_bytes": os.path.getsize(dest),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compressed, random-access archive of discussion logs")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build", help="Archive a log (.json, .jsonl or .archive)")
+    build_parser.add_argument("source")
+    build_parser.add_argument("dest")
+    build_parser.add_argument("--dict-size", type=int, default=DEFAULT_DICT_SIZE,
+                              help="Dictionary size in bytes (0 disables the dictionary)")
+    build_parser.add_argument("--level", type=int, default=DEFAULT_LEVEL, help="zstd compression level")
+
+    info_parser = subparsers.add_parser("info", help="Summarize an archive")
+    info_parser.add_argument("archive")
+
+    show_parser = subparsers.add_parser("show", help="Print one session as JSON")
+    show_parser.add_argument("archive")
+    show_parser.add_argument("session_id")
+
+    args = parser.parse_args()
+    if args.command == "build":
+        try:
+            stats = build(args.source, args.dest, dict_size=args.dict_size, level=args.level)
+        except ValueError as e:
+            parser.exit(1, f"{e}\n")
+        print(f"Archived {stats['sessions']} sessions ({stats['iterations']} iterations) to {args.dest}: "
+              f"{stats['source_bytes']} -> {stats['archive_bytes']} bytes "
+              f"({stats['source_bytes'] / max(stats['archive_bytes'], 1):.1f}x)")
+    elif args.command == "info":
+        index = ArchiveLogStore(args.archive).index()
+        print(json.dumps({
+            "sessions": len(index["sessions"]),
+            "iterations": sum(entry[3] for entry in index["sessions"]),
+            "dictionary_bytes": index["dictionary"][1],
+            "archive_bytes": os.path.getsize(args.archive),
+            "live_block_bytes": sum(entry[2] for entry in index["sessions"]),
+        }, indent=2))
+    else:
+        session = ArchiveLogStore(args.archive).get_session(args.session_id)
+        if session is None:
+            parser.exit(1, f"No session {args.session_id} in {args.archive}\n")
+        print(json.dumps(session, indent=2))
+
+
+if __name__ == "__main__":
+    main()